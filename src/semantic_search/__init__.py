@@ -1,10 +1,23 @@
 """Semantic search MCP server for Obsidian vaults."""
 
+from typing import TYPE_CHECKING, Any
+
 try:
     from ._version import __version__
 except ImportError:
     __version__ = "0.0.0+unknown"
 
-from .indexer import VaultIndexer, VaultWatcher
+if TYPE_CHECKING:
+    from .indexer import VaultIndexer, VaultWatcher
 
 __all__ = ["VaultIndexer", "VaultWatcher", "__version__"]
+
+
+def __getattr__(name: str) -> Any:
+    # Import the indexer (and with it torch, sentence-transformers and FAISS) on
+    # first use, so `semantic-search --help` and usage errors return instantly
+    if name in ("VaultIndexer", "VaultWatcher"):
+        from . import indexer
+
+        return getattr(indexer, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
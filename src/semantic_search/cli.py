@@ -4,8 +4,6 @@ import argparse
 import os
 import sys
 
-from .indexer import VaultIndexer
-
 
 def _get_content_path() -> str:
     """Get content path from environment or error."""
@@ -33,6 +31,8 @@ def search() -> None:
         print(f"Query: {query}", file=sys.stderr)
         print(file=sys.stderr)
 
+    from .indexer import VaultIndexer  # heavy (torch, FAISS): import after arg parsing
+
     indexer = VaultIndexer(content_path)
 
     results = indexer.search(query, top_k=args.top_k)
@@ -62,6 +62,8 @@ def duplicates() -> None:
         print(f"File: {args.file}", file=sys.stderr)
         print(file=sys.stderr)
 
+    from .indexer import VaultIndexer  # heavy (torch, FAISS): import after arg parsing
+
     indexer = VaultIndexer(content_path, duplicate_threshold=args.threshold)
 
     results = indexer.find_duplicates(args.file)
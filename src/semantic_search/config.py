@@ -0,0 +1,22 @@
+"""Configuration from the environment."""
+
+import os
+
+DEFAULT_CONTENT_PATH = "./content"
+
+
+def parse_content_path(raw: str) -> list[str]:
+    """Split a comma-separated CONTENT_PATH value into directory paths.
+
+    Args:
+        raw: CONTENT_PATH value, e.g. "/vault1, /vault2"
+
+    Returns:
+        Paths with surrounding whitespace trimmed and empty segments dropped
+    """
+    return [path for path in (segment.strip() for segment in raw.split(",")) if path]
+
+
+def content_paths_from_env() -> list[str]:
+    """Return the directories to index from CONTENT_PATH (default ./content)."""
+    return parse_content_path(os.environ.get("CONTENT_PATH", DEFAULT_CONTENT_PATH))
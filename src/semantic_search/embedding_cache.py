@@ -0,0 +1,322 @@
+"""Persistent content-hash -> embedding cache for the indexer."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from semantic_search.locking import locked
+
+logger = logging.getLogger(__name__)
+
+_VECTORS_FILENAME = "embed_cache.npy"
+_MAP_FILENAME = "embed_cache_map.json"
+_TAIL_FILENAME = "embed_cache.tail.f32"
+_JOURNAL_FILENAME = "embed_cache.journal.jsonl"
+_LOCK_FILENAME = "embed_cache.lock"
+# Saved rows no longer referenced by any key (discarded) before save() rewrites
+# the files without them: at least this many, and a quarter of the live rows
+COMPACT_MIN_DEAD_ROWS = 1024
+_NO_ROWS = np.empty((0, 0), dtype=np.float32)
+
+
+class EmbeddingCache:
+    """Maps blake2b(model + text) to a previously computed embedding.
+
+    Vectors live in a memory-mapped ``embed_cache.npy`` next to the FAISS index;
+    ``embed_cache_map.json`` maps each hex digest to its row. Rebuilds and watcher
+    updates look texts up here first and only run the encoder for cache misses,
+    so re-indexing an unchanged vault costs a dict lookup per file.
+
+    save() appends new vectors to ``embed_cache.tail.f32`` and their keys (plus
+    discarded keys) to one ``embed_cache.journal.jsonl`` line, so a watcher flush
+    writes O(changed) bytes. Everything is rewritten into ``embed_cache.npy`` after
+    retain(), once discarded rows pile up, or when another process sharing the
+    directory has written since this one last loaded or saved.
+
+    All methods are thread-safe. New entries are kept in memory until save().
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str) -> None:
+        """Load the cache for `model_name` from `cache_dir`, if present.
+
+        Args:
+            cache_dir: Directory holding the cache files (the index dir).
+            model_name: Embedding model name; part of every key so switching
+                models never serves stale vectors.
+        """
+        self.vectors_file = cache_dir / _VECTORS_FILENAME
+        self.map_file = cache_dir / _MAP_FILENAME
+        self.tail_file = cache_dir / _TAIL_FILENAME
+        self.journal_file = cache_dir / _JOURNAL_FILENAME
+        self.lock_file = cache_dir / _LOCK_FILENAME
+        self._model_name = model_name
+        # Hash state after the model prefix; key() copies it instead of rehashing
+        self._key_prefix = hashlib.blake2b(f"{model_name}\0".encode(), digest_size=16)
+        self._lock = threading.Lock()
+        # Saved rows are numbered across both files: vectors_file first, then tail_file
+        self._rows: dict[str, int] = {}
+        self._vectors: np.ndarray = _NO_ROWS
+        self._tail: np.ndarray = _NO_ROWS
+        self._base_len = 0
+        self._tail_len = 0
+        self._pending: dict[str, np.ndarray] = {}
+        self._discarded: set[str] = set()  # saved keys dropped since the last save
+        self._dead_rows = 0
+        # Appending is only valid on top of a vectors_file for this model
+        self._rewrite_needed = True
+        self._disk_state: tuple[tuple[int, int, int] | None, ...] = ()
+        self._dirty = False
+        self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows) + len(self._pending)
+
+    def key(self, text: str) -> str:
+        """Return the cache key for `text` under this cache's model."""
+        h = self._key_prefix.copy()
+        h.update(text.encode())
+        return h.hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Return the cached vectors for whichever of `keys` are present."""
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vec = self._pending.get(key)
+                if vec is None:
+                    row = self._rows.get(key)
+                    if row is None:
+                        continue
+                    if row < self._base_len:
+                        vec = self._vectors[row]
+                    else:
+                        vec = self._tail[row - self._base_len]
+                found[key] = vec
+        return found
+
+    def put_many(self, items: dict[str, np.ndarray]) -> None:
+        """Add freshly computed vectors; persisted on the next save()."""
+        if not items:
+            return
+        with self._lock:
+            for key, vec in items.items():
+                if key not in self._rows:
+                    self._pending[key] = np.asarray(vec, dtype=np.float32)
+            self._dirty = True
+
+    def discard(self, keys: set[str]) -> None:
+        """Drop whichever of `keys` are present."""
+        with self._lock:
+            self._drop(keys & (self._rows.keys() | self._pending.keys()))
+
+    def retain(self, keys: set[str]) -> None:
+        """Drop every entry not in `keys` (called after a full rebuild).
+
+        The next save() rewrites the cache files without the dropped rows.
+        """
+        with self._lock:
+            stale = (self._rows.keys() | self._pending.keys()) - keys
+            self._drop(stale)
+            if stale:
+                self._rewrite_needed = True
+
+    def save(self) -> None:
+        """Write the cache to disk if anything changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            with locked(self.lock_file):
+                rewrite = (
+                    self._rewrite_needed
+                    or self._dead_rows > max(COMPACT_MIN_DEAD_ROWS, len(self._rows) // 4)
+                    or self._stat_files() != self._disk_state
+                )
+                if rewrite:
+                    self._rewrite()
+                else:
+                    self._append()
+                self._disk_state = self._stat_files()
+            self._dirty = False
+            count = len(self._rows)
+        logger.debug(
+            f"[EmbeddingCache] Saved {count} entries ({'rewrite' if rewrite else 'append'})"
+        )
+
+    def _drop(self, keys: set[str]) -> None:
+        """Forget `keys`, counting saved rows as dead. Must hold self._lock."""
+        if not keys:
+            return
+        for key in keys:
+            self._pending.pop(key, None)
+            if self._rows.pop(key, None) is not None:
+                self._discarded.add(key)
+                self._dead_rows += 1
+        self._dirty = True
+
+    def _saved_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Gather saved rows from vectors_file and tail_file into one matrix."""
+        out = np.empty((len(rows), self._vectors.shape[1]), dtype=np.float32)
+        in_base = rows < self._base_len
+        out[in_base] = self._vectors[rows[in_base]]
+        if not in_base.all():
+            out[~in_base] = self._tail[rows[~in_base] - self._base_len]
+        return out
+
+    def _unlink_tail(self) -> None:
+        """Delete the journal, then the tail it points into."""
+        self.journal_file.unlink(missing_ok=True)
+        self.tail_file.unlink(missing_ok=True)
+
+    def _append(self) -> None:
+        """Append pending vectors and one journal line. Must hold both locks."""
+        added = list(self._pending)
+        if added:
+            with open(self.tail_file, "ab") as f:
+                f.write(np.ascontiguousarray(np.stack(list(self._pending.values()))).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        record = {"added": added, "discarded": sorted(self._discarded)}
+        with open(self.journal_file, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for key in added:
+            self._rows[key] = self._base_len + self._tail_len
+            self._tail_len += 1
+        self._map_tail()
+        self._pending = {}
+        self._discarded = set()
+
+    def _rewrite(self) -> None:
+        """Write every live vector to vectors_file and drop the tail. Must hold both locks."""
+        keys = list(self._rows) + list(self._pending)
+        rows: list[np.ndarray] = []
+        if self._rows:
+            rows.append(self._saved_rows(np.fromiter(self._rows.values(), dtype=np.int64)))
+        if self._pending:
+            rows.append(np.stack(list(self._pending.values())))
+        self._pending, self._discarded = {}, set()
+        self._tail, self._tail_len, self._dead_rows = _NO_ROWS, 0, 0
+        if not rows:
+            self._unlink_tail()
+            self.vectors_file.unlink(missing_ok=True)
+            self.map_file.unlink(missing_ok=True)
+            self._rows, self._vectors, self._base_len = {}, _NO_ROWS, 0
+            self._rewrite_needed = True
+            return
+        matrix = np.ascontiguousarray(np.vstack(rows), dtype=np.float32)
+
+        # Write to temp files and rename so a crash never leaves a map that
+        # points past the end of the vector file.
+        tmp_vectors = self.vectors_file.with_suffix(".npy.tmp")
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, matrix)
+        tmp_map = self.map_file.with_suffix(".json.tmp")
+        tmp_map.write_text(json.dumps({"model": self._model_name, "rows": keys}))
+        os.replace(tmp_vectors, self.vectors_file)
+        os.replace(tmp_map, self.map_file)
+        # A journal left behind by a crash here only re-adds vectors under their
+        # own keys, so the new vectors_file stays correct either way
+        self._unlink_tail()
+
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._vectors = np.load(self.vectors_file, mmap_mode="r")
+        self._base_len = len(keys)
+        self._rewrite_needed = False
+
+    def _map_tail(self) -> None:
+        """Memory-map the first self._tail_len rows of tail_file."""
+        if not self._tail_len:
+            self._tail = _NO_ROWS
+            return
+        shape = (self._tail_len, self._vectors.shape[1])
+        self._tail = np.memmap(self.tail_file, dtype=np.float32, mode="r", shape=shape)
+
+    def _stat_files(self) -> tuple[tuple[int, int, int] | None, ...]:
+        """Return (inode, mtime_ns, size) of the map, journal and tail files.
+
+        The map file is replaced on every rewrite and the other two only grow
+        between rewrites, so any write by another process changes this.
+        """
+        state: list[tuple[int, int, int] | None] = []
+        for path in (self.map_file, self.journal_file, self.tail_file):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                state.append(None)
+                continue
+            state.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return tuple(state)
+
+    def _load(self) -> None:
+        """Open the on-disk cache; any mismatch or error means starting empty."""
+        if not (self.vectors_file.exists() and self.map_file.exists()):
+            return
+        with locked(self.lock_file):
+            try:
+                data = json.loads(self.map_file.read_text())
+                vectors = np.load(self.vectors_file, mmap_mode="r")
+                keys = data["rows"]
+                if data.get("model") != self._model_name or len(keys) != len(vectors):
+                    logger.info(
+                        "[EmbeddingCache] Cache does not match model or is truncated; ignoring"
+                    )
+                    return
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"[EmbeddingCache] Could not load cache ({e}); starting empty")
+                return
+            self._rows = {key: row for row, key in enumerate(keys)}
+            self._vectors = vectors
+            self._base_len = len(keys)
+            self._rewrite_needed = False
+            self._replay_journal()
+            self._disk_state = self._stat_files()
+        logger.info(f"[EmbeddingCache] Loaded {len(self._rows)} cached embeddings")
+
+    def _replay_journal(self) -> None:
+        """Apply the journal and map the tail rows it references. Must hold lock_file.
+
+        A torn last line and tail rows no journal line references (left by an
+        interrupted save) are truncated away, so the next append starts clean.
+        """
+        if not self.journal_file.exists():
+            self.tail_file.unlink(missing_ok=True)
+            return
+        row_bytes = self._vectors.shape[1] * 4
+        try:
+            tail_size = self.tail_file.stat().st_size
+        except FileNotFoundError:
+            tail_size = 0
+        rows = dict(self._rows)
+        tail_len = 0
+        good_bytes = 0
+        with open(self.journal_file, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                    added, discarded = list(record["added"]), list(record["discarded"])
+                except (ValueError, KeyError, TypeError):
+                    break
+                if (tail_len + len(added)) * row_bytes > tail_size:
+                    break
+                for key in discarded:
+                    rows.pop(key, None)
+                for key in added:
+                    rows[key] = self._base_len + tail_len
+                    tail_len += 1
+                good_bytes += len(line)
+        os.truncate(self.journal_file, good_bytes)
+        if tail_size:
+            os.truncate(self.tail_file, tail_len * row_bytes)
+        self._rows = rows
+        self._tail_len = tail_len
+        self._dead_rows = self._base_len + tail_len - len(rows)
+        self._map_tail()
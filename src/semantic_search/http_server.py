@@ -7,6 +7,7 @@ import os
 from collections.abc import AsyncIterator
 from typing import Any
 
+import orjson
 from starlette.applications import Starlette
 from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
@@ -14,14 +15,22 @@ from starlette.responses import JSONResponse
 from starlette.routing import Mount, Route
 
 from ._version import __version__
+from .config import content_paths_from_env
 from .factory import create_indexer
 from .indexer import VaultIndexer
 from .server import mcp  # reuse the existing FastMCP instance with tools registered
 
 logger = logging.getLogger(__name__)
 
-_raw_paths = os.environ.get("CONTENT_PATH", "./content")
-CONTENT_PATHS = [p.strip() for p in _raw_paths.split(",") if p.strip()]
+CONTENT_PATHS = content_paths_from_env()
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson, which emits UTF-8 bytes directly."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
 
 _indexer: VaultIndexer | None = None
 _indexer_ready: asyncio.Event = asyncio.Event()
@@ -60,10 +69,10 @@ async def _build_indexer_in_background() -> None:
         _indexer_ready.set()
 
 
-async def health(request: Request) -> JSONResponse:
+async def health(request: Request) -> ORJSONResponse:
     """Handle /health endpoint. Never blocks on indexer construction."""
     if _indexer_error is not None:
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "status": "error",
                 "ready": False,
@@ -73,14 +82,14 @@ async def health(request: Request) -> JSONResponse:
             status_code=500,
         )
     if not _indexer_ready.is_set() or _indexer is None:
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "status": "indexing",
                 "ready": False,
                 "paths": CONTENT_PATHS,
             }
         )
-    return JSONResponse(
+    return ORJSONResponse(
         {
             "status": "ok",
             "ready": True,
@@ -90,21 +99,21 @@ async def health(request: Request) -> JSONResponse:
     )
 
 
-def _not_ready_response() -> JSONResponse:
+def _not_ready_response() -> ORJSONResponse:
     """503 response returned while the initial index build is in flight."""
-    return JSONResponse(
+    return ORJSONResponse(
         {"error": "indexing in progress", "ready": False},
         status_code=503,
         headers={"Retry-After": "5"},
     )
 
 
-async def search(request: Request) -> JSONResponse:
+async def search(request: Request) -> ORJSONResponse:
     """Handle /search endpoint."""
     try:
         q = request.query_params.get("q")
         if not q:
-            return JSONResponse({"error": "Missing 'q' parameter"}, status_code=400)
+            return ORJSONResponse({"error": "Missing 'q' parameter"}, status_code=400)
 
         # gate on readiness before touching the indexer
         if not _indexer_ready.is_set() or _indexer is None:
@@ -113,18 +122,18 @@ async def search(request: Request) -> JSONResponse:
         top_k = int(request.query_params.get("top_k", "5"))
         indexer = get_indexer()
         results: list[Any] = await run_in_threadpool(indexer.search, q, top_k)
-        return JSONResponse({"query": q, "results": results, "count": len(results)})
+        return ORJSONResponse({"query": q, "results": results, "count": len(results)})
     except Exception as e:
         logger.exception("Error handling /search request")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 
-async def duplicates(request: Request) -> JSONResponse:
+async def duplicates(request: Request) -> ORJSONResponse:
     """Handle /duplicates endpoint."""
     try:
         file_path = request.query_params.get("file")
         if not file_path:
-            return JSONResponse({"error": "Missing 'file' parameter"}, status_code=400)
+            return ORJSONResponse({"error": "Missing 'file' parameter"}, status_code=400)
 
         # gate on readiness before touching the indexer
         if not _indexer_ready.is_set() or _indexer is None:
@@ -136,9 +145,9 @@ async def duplicates(request: Request) -> JSONResponse:
         results = await run_in_threadpool(indexer.find_duplicates, file_path)
 
         if isinstance(results, dict) and "error" in results:
-            return JSONResponse({"error": str(results["error"])}, status_code=400)
+            return ORJSONResponse({"error": str(results["error"])}, status_code=400)
 
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "file": file_path,
                 "threshold": threshold,
@@ -148,10 +157,10 @@ async def duplicates(request: Request) -> JSONResponse:
         )
     except Exception as e:
         logger.exception("Error handling /duplicates request")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 
-async def content(request: Request) -> JSONResponse:
+async def content(request: Request) -> ORJSONResponse:
     """Handle /content endpoint.
 
     Returns file content for a given path, optionally as a snippet around
@@ -160,7 +169,7 @@ async def content(request: Request) -> JSONResponse:
     # Step 1: parse path (must be first)
     path = request.query_params.get("path")
     if not path:
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": {"code": "MISSING_PATH", "message": "Missing 'path' parameter"}},
             status_code=400,
         )
@@ -181,7 +190,7 @@ async def content(request: Request) -> JSONResponse:
     try:
         context_lines = int(context_lines_str)
     except ValueError:
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "error": {
                     "code": "INVALID_CONTEXT_LINES",
@@ -197,25 +206,25 @@ async def content(request: Request) -> JSONResponse:
         result = await run_in_threadpool(indexer.get_content, path, snippet, query, context_lines)
     except ValueError:
         logger.warning("path not in indexed roots: %s", path)
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": {"code": "PATH_OUTSIDE_ROOTS", "message": "path not in indexed roots"}},
             status_code=400,
         )
     except FileNotFoundError:
         logger.info("file not found: %s", path)
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": {"code": "FILE_NOT_FOUND", "message": f"file not found: {path}"}},
             status_code=404,
         )
     except RuntimeError:
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": {"code": "UNREADABLE_FILE", "message": f"could not read file: {path}"}},
             status_code=422,
         )
-    return JSONResponse(result, status_code=200)
+    return ORJSONResponse(result, status_code=200)
 
 
-async def reindex(request: Request) -> JSONResponse:
+async def reindex(request: Request) -> ORJSONResponse:
     """Handle /reindex endpoint. Blocks until reindex completes.
 
     Returns 503 if the initial index build is still running — the client
@@ -227,8 +236,8 @@ async def reindex(request: Request) -> JSONResponse:
         return _not_ready_response()
     try:
         logger.info("Forcing reindex...")
-        await run_in_threadpool(_indexer.rebuild_index)
-        return JSONResponse(
+        await run_in_threadpool(_indexer.rebuild_index, reread=True)
+        return ORJSONResponse(
             {
                 "status": "ok",
                 "message": "Reindex complete",
@@ -237,7 +246,7 @@ async def reindex(request: Request) -> JSONResponse:
         )
     except Exception as e:
         logger.exception("Error handling /reindex request")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 
 def build_app() -> Starlette:
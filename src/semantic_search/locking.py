@@ -0,0 +1,29 @@
+"""Advisory file locks for files shared by several processes over one vault."""
+
+import contextlib
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock; one writer per cache dir is assumed
+    fcntl = None  # type: ignore[assignment]
+
+
+@contextlib.contextmanager
+def locked(lock_file: Path) -> Iterator[None]:
+    """Hold an exclusive flock on `lock_file` (created if missing) for the block.
+
+    The MCP server, HTTP server and CLI over one vault share its cache dir and
+    each runs its own watcher, so appends to shared files must not interleave.
+    The lock is tied to the open file, so it is released when the block exits,
+    also when the process dies.
+    """
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
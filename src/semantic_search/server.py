@@ -1,17 +1,16 @@
 """MCP server for semantic search."""
 
 import logging
-import os
 
 from fastmcp import FastMCP
 
+from .config import content_paths_from_env
 from .factory import create_indexer
 
 logger = logging.getLogger(__name__)
 
 # Configuration from environment - supports comma-separated paths
-_raw_paths = os.environ.get("CONTENT_PATH", "./content")
-CONTENT_PATHS = [p.strip() for p in _raw_paths.split(",") if p.strip()]
+CONTENT_PATHS = content_paths_from_env()
 
 # MCP server instance
 mcp = FastMCP("semantic-search")
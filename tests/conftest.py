@@ -1,10 +1,25 @@
 """Pytest fixtures for testing."""
 
+from collections.abc import Iterator
 from pathlib import Path
-from unittest.mock import Mock
+from typing import TYPE_CHECKING, Any
+from unittest.mock import MagicMock, Mock, patch
 
+import numpy as np
 import pytest
 
+if TYPE_CHECKING:
+    from semantic_search.indexer import VaultIndexer
+
+# One shared fake embedding row; mocks hand out read-only views of it
+_FAKE_EMBED = np.full((1, 384), 0.1, dtype=np.float32)
+_FAKE_EMBED.setflags(write=False)
+
+
+def _fake_encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+    """Stand-in for SentenceTransformer.encode: one constant row per input text."""
+    return np.broadcast_to(_FAKE_EMBED, (len(texts), 384))
+
 
 @pytest.fixture(autouse=True)
 def _isolated_indexer_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
@@ -23,6 +38,44 @@ def _isolated_indexer_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) ->
     )
 
 
+@pytest.fixture
+def mock_st() -> Iterator[MagicMock]:
+    """Patch the indexer's SentenceTransformer with a fast 384-dim fake.
+
+    Modules that build a VaultIndexer opt in for every test via
+    ``pytestmark = pytest.mark.usefixtures("mock_st")``; tests that need to
+    reconfigure the model (custom encode, GPU device, ONNX backend) take the
+    fixture as an argument and adjust ``mock_st.return_value``.
+    """
+    with patch("semantic_search.indexer.SentenceTransformer") as mock:
+        mock.return_value.get_sentence_embedding_dimension.return_value = 384
+        mock.return_value.encode.side_effect = _fake_encode
+        yield mock
+
+
+@pytest.fixture(scope="session")
+def parsing_indexer(tmp_path_factory: pytest.TempPathFactory) -> "VaultIndexer":
+    """One VaultIndexer over an empty vault, shared by the whole session.
+
+    Only for tests of its pure text helpers (_prepare_parts_for_embedding,
+    _extract_inline_tags) that take the note content as an argument; never
+    index, update or search with it, or state leaks between tests.
+    """
+    root = tmp_path_factory.mktemp("parsing-indexer")
+    vault = root / "vault"
+    vault.mkdir()
+    with (
+        patch("semantic_search.indexer.SentenceTransformer") as mock,
+        patch("semantic_search.indexer.user_cache_dir", return_value=str(root / "cache")),
+    ):
+        mock.return_value.get_sentence_embedding_dimension.return_value = 384
+        mock.return_value.encode.side_effect = _fake_encode
+
+        from semantic_search.indexer import VaultIndexer
+
+        return VaultIndexer(str(vault))
+
+
 @pytest.fixture
 def temp_vault(tmp_path: Path) -> Path:
     """Create a temporary vault directory with test markdown files."""
@@ -64,5 +117,5 @@ def mock_sentence_transformer() -> Mock:
     """Create a mock SentenceTransformer."""
     mock = Mock()
     mock.get_sentence_embedding_dimension.return_value = 384
-    mock.encode.return_value = [[0.1] * 384]
+    mock.encode.return_value = _FAKE_EMBED
     return mock
@@ -0,0 +1,185 @@
+"""Tests for EmbeddingCache."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from semantic_search.embedding_cache import EmbeddingCache
+
+
+def _vec(value: float) -> np.ndarray:
+    return np.full(384, value, dtype=np.float32)
+
+
+class TestEmbeddingCacheKeys:
+    """Tests for cache key derivation."""
+
+    def test_key_depends_on_model_and_text(self, tmp_path: Path) -> None:
+        """The same text under a different model must not share a key."""
+        cache_a = EmbeddingCache(tmp_path, "model-a")
+        cache_b = EmbeddingCache(tmp_path, "model-b")
+
+        assert cache_a.key("hello") == cache_a.key("hello")
+        assert cache_a.key("hello") != cache_a.key("world")
+        assert cache_a.key("hello") != cache_b.key("hello")
+
+
+class TestEmbeddingCachePersistence:
+    """Tests for saving and loading the on-disk cache."""
+
+    def test_put_then_get_before_save(self, tmp_path: Path) -> None:
+        """Entries are served from memory before they are persisted."""
+        cache = EmbeddingCache(tmp_path, "model")
+        key = cache.key("note")
+        cache.put_many({key: _vec(0.5)})
+
+        found = cache.get_many([key, cache.key("missing")])
+
+        assert list(found) == [key]
+        np.testing.assert_array_equal(found[key], _vec(0.5))
+
+    def test_save_and_reload_round_trip(self, tmp_path: Path) -> None:
+        """A fresh cache over the same directory sees previously saved vectors."""
+        cache = EmbeddingCache(tmp_path, "model")
+        keys = [cache.key("a"), cache.key("b")]
+        cache.put_many({keys[0]: _vec(0.1), keys[1]: _vec(0.2)})
+        cache.save()
+
+        reloaded = EmbeddingCache(tmp_path, "model")
+        found = reloaded.get_many(keys)
+
+        assert len(reloaded) == 2
+        np.testing.assert_allclose(found[keys[0]], _vec(0.1))
+        np.testing.assert_allclose(found[keys[1]], _vec(0.2))
+
+    def test_cache_for_other_model_is_ignored(self, tmp_path: Path) -> None:
+        """Switching the embedding model starts from an empty cache."""
+        cache = EmbeddingCache(tmp_path, "model-a")
+        cache.put_many({cache.key("a"): _vec(0.1)})
+        cache.save()
+
+        assert len(EmbeddingCache(tmp_path, "model-b")) == 0
+
+    def test_corrupt_map_file_starts_empty(self, tmp_path: Path) -> None:
+        """An unreadable map file must not raise; the cache just starts empty."""
+        cache = EmbeddingCache(tmp_path, "model")
+        cache.put_many({cache.key("a"): _vec(0.1)})
+        cache.save()
+        cache.map_file.write_text("{not json")
+
+        assert len(EmbeddingCache(tmp_path, "model")) == 0
+
+    def test_retain_drops_stale_entries(self, tmp_path: Path) -> None:
+        """retain() removes every key not in the given set, also on disk."""
+        cache = EmbeddingCache(tmp_path, "model")
+        keep, drop = cache.key("keep"), cache.key("drop")
+        cache.put_many({keep: _vec(0.1), drop: _vec(0.2)})
+        cache.save()
+
+        cache.retain({keep})
+        cache.save()
+
+        reloaded = EmbeddingCache(tmp_path, "model")
+        assert list(reloaded.get_many([keep, drop])) == [keep]
+
+    def test_discard_drops_only_given_keys(self, tmp_path: Path) -> None:
+        """discard() removes the given keys, saved or pending, and nothing else."""
+        cache = EmbeddingCache(tmp_path, "model")
+        saved, pending, keep = cache.key("saved"), cache.key("pending"), cache.key("keep")
+        cache.put_many({saved: _vec(0.1), keep: _vec(0.2)})
+        cache.save()
+        cache.put_many({pending: _vec(0.3)})
+
+        cache.discard({saved, pending, cache.key("absent")})
+        cache.save()
+
+        reloaded = EmbeddingCache(tmp_path, "model")
+        assert list(reloaded.get_many([saved, pending, keep])) == [keep]
+
+
+class TestEmbeddingCacheAppend:
+    """Tests for appending to the tail and journal instead of rewriting."""
+
+    def test_save_appends_new_rows(self, tmp_path: Path) -> None:
+        """Once the vector file exists, saves append to the tail without touching it."""
+        cache = EmbeddingCache(tmp_path, "model")
+        first, second = cache.key("first"), cache.key("second")
+        cache.put_many({first: _vec(0.1)})
+        cache.save()
+        before = cache.vectors_file.stat()
+
+        cache.put_many({second: _vec(0.2)})
+        cache.save()
+
+        after = cache.vectors_file.stat()
+        assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+        assert cache.tail_file.stat().st_size == 384 * 4
+        found = EmbeddingCache(tmp_path, "model").get_many([first, second])
+        np.testing.assert_allclose(found[first], _vec(0.1))
+        np.testing.assert_allclose(found[second], _vec(0.2))
+
+    def test_discards_are_journaled_then_compacted(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Discards are appended; once dead rows pass the threshold the files
+        are rewritten without them."""
+        monkeypatch.setattr("semantic_search.embedding_cache.COMPACT_MIN_DEAD_ROWS", 1)
+        cache = EmbeddingCache(tmp_path, "model")
+        keys = [cache.key(str(i)) for i in range(8)]
+        cache.put_many({key: _vec(i) for i, key in enumerate(keys)})
+        cache.save()
+
+        cache.discard({keys[0]})
+        cache.save()
+        assert cache.journal_file.exists()
+        assert list(EmbeddingCache(tmp_path, "model").get_many(keys[:2])) == [keys[1]]
+
+        cache.discard({keys[1], keys[2]})
+        cache.save()
+        assert not cache.journal_file.exists()
+        assert len(np.load(cache.vectors_file)) == 5
+        found = EmbeddingCache(tmp_path, "model").get_many(keys)
+        assert list(found) == keys[3:]
+        np.testing.assert_allclose(found[keys[7]], _vec(7))
+
+    def test_interrupted_append_is_truncated(self, tmp_path: Path) -> None:
+        """Tail rows without a journal line and a torn journal line are dropped on
+        load, and later appends are read back correctly."""
+        cache = EmbeddingCache(tmp_path, "model")
+        saved, appended, later = cache.key("saved"), cache.key("appended"), cache.key("later")
+        cache.put_many({saved: _vec(0.1)})
+        cache.save()
+        cache.put_many({appended: _vec(0.2)})
+        cache.save()
+        with open(cache.tail_file, "ab") as f:
+            f.write(_vec(0.9).tobytes())
+        with open(cache.journal_file, "a") as f:
+            f.write('{"added": ["')
+
+        reloaded = EmbeddingCache(tmp_path, "model")
+        reloaded.put_many({later: _vec(0.3)})
+        reloaded.save()
+
+        found = EmbeddingCache(tmp_path, "model").get_many([saved, appended, later])
+        assert list(found) == [saved, appended, later]
+        np.testing.assert_allclose(found[later], _vec(0.3))
+
+    def test_write_by_other_process_forces_rewrite(self, tmp_path: Path) -> None:
+        """If another cache over the same directory saved since this one loaded,
+        save() rewrites instead of appending onto rows it does not know about."""
+        first = EmbeddingCache(tmp_path, "model")
+        base, mine, theirs = first.key("base"), first.key("mine"), first.key("theirs")
+        first.put_many({base: _vec(0.1)})
+        first.save()
+        second = EmbeddingCache(tmp_path, "model")
+        first.put_many({theirs: _vec(0.2)})
+        first.save()
+
+        second.put_many({mine: _vec(0.3)})
+        second.save()
+
+        assert not second.tail_file.exists()
+        found = EmbeddingCache(tmp_path, "model").get_many([base, mine, theirs])
+        assert list(found) == [base, mine]
+        np.testing.assert_allclose(found[mine], _vec(0.3))
@@ -3,6 +3,8 @@
 import asyncio
 import re
 import sys
+from collections.abc import Iterator
+from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
@@ -11,79 +13,74 @@ from starlette.testclient import TestClient
 from semantic_search.http_server import build_app, main
 
 
-class TestHealthEndpoint:
-    def test_health_returns_ok(self) -> None:
-        import semantic_search.http_server as http_server
+@pytest.fixture
+def mock_indexer(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """Install a ready MagicMock as the server's indexer for one test."""
+    import semantic_search.http_server as http_server
+
+    ready_event = asyncio.Event()
+    ready_event.set()
+    indexer = MagicMock()
+    monkeypatch.setattr(http_server, "_indexer_ready", ready_event)
+    monkeypatch.setattr(http_server, "_indexer", indexer)
+    monkeypatch.setattr(http_server, "_indexer_error", None)
+    return indexer
+
+
+@pytest.fixture
+def not_ready(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep the server in its initial-build state for one test."""
+    import semantic_search.http_server as http_server
+
+    async def never_completes() -> None:
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(http_server, "_indexer_ready", asyncio.Event())  # unset
+    monkeypatch.setattr(http_server, "_indexer", None)
+    monkeypatch.setattr(http_server, "_indexer_error", None)
+    monkeypatch.setattr(http_server, "_build_indexer_in_background", never_completes)
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    """A TestClient with the app lifespan running.
+
+    Request it after mock_indexer / not_ready so the server state is in place
+    before the lifespan starts.
+    """
+    with TestClient(build_app()) as test_client:
+        yield test_client
 
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        original_error = http_server._indexer_error
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.meta = {"0": {}, "1": {}}
-            http_server._indexer = mock_indexer
-            http_server._indexer_error = None
-            with TestClient(build_app()) as client:
-                resp = client.get("/health")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
-            http_server._indexer_error = original_error
+
+class TestHealthEndpoint:
+    def test_health_returns_ok(self, mock_indexer: MagicMock, client: TestClient) -> None:
+        mock_indexer.meta = {"0": {}, "1": {}}
+        resp = client.get("/health")
         assert resp.status_code == 200
         data = resp.json()
         assert data["status"] == "ok"
         assert "paths" in data
         assert data["indexed_files"] == 2
 
-    def test_health_returns_indexing_status_when_not_ready(self) -> None:
+    def test_health_returns_indexing_status_when_not_ready(
+        self, not_ready: None, client: TestClient
+    ) -> None:
         """Before the background build finishes, /health must report
         status=indexing without blocking on the indexer."""
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        original_error = http_server._indexer_error
-        try:
-            http_server._indexer_ready = asyncio.Event()  # unset
-            http_server._indexer = None
-            http_server._indexer_error = None
-            with TestClient(build_app()) as client:
-                resp = client.get("/health")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
-            http_server._indexer_error = original_error
+        resp = client.get("/health")
         assert resp.status_code == 200
         data = resp.json()
         assert data["status"] == "indexing"
         assert data["ready"] is False
         assert "paths" in data
 
-    def test_health_returns_ok_when_ready(self) -> None:
+    def test_health_returns_ok_when_ready(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """Once the Event is set and _indexer is populated, /health returns
         the full ready response with indexed_files count."""
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        original_error = http_server._indexer_error
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.meta = {"0": {}, "1": {}, "2": {}}
-            http_server._indexer = mock_indexer
-            http_server._indexer_error = None
-            with TestClient(build_app()) as client:
-                resp = client.get("/health")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
-            http_server._indexer_error = original_error
+        mock_indexer.meta = {"0": {}, "1": {}, "2": {}}
+        resp = client.get("/health")
         assert resp.status_code == 200
         data = resp.json()
         assert data["status"] == "ok"
@@ -93,39 +90,49 @@ class TestHealthEndpoint:
 
 
 class TestSearchEndpoint:
-    def test_search_missing_query_returns_400(self) -> None:
-        with TestClient(build_app()) as client:
-            resp = client.get("/search")
+    def test_search_missing_query_returns_400(self, client: TestClient) -> None:
+        resp = client.get("/search")
         assert resp.status_code == 400
         assert "Missing 'q' parameter" in resp.json()["error"]
 
-    def test_search_with_query(self) -> None:
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.search.return_value = [
-                {"path": "a.md", "score": 0.9},
-                {"path": "b.md", "score": 0.8},
-            ]
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/search?q=test+query&top_k=3")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+    def test_search_with_query(self, mock_indexer: MagicMock, client: TestClient) -> None:
+        mock_indexer.search.return_value = [
+            {"path": "a.md", "score": 0.9},
+            {"path": "b.md", "score": 0.8},
+        ]
+        resp = client.get("/search?q=test+query&top_k=3")
         assert resp.status_code == 200
         data = resp.json()
         assert data["query"] == "test query"
         assert data["count"] == 2
         mock_indexer.search.assert_called_once_with("test query", 3)
 
-    def test_search_runs_in_threadpool(self) -> None:
+    def test_repeated_query_is_encoded_once(
+        self, temp_vault: Path, mock_st: MagicMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A repeated /search query is answered from the indexer's query-embedding
+        cache instead of running the model again."""
+        import semantic_search.http_server as http_server
+        from semantic_search.indexer import VaultIndexer
+
+        ready_event = asyncio.Event()
+        ready_event.set()
+        monkeypatch.setattr(http_server, "_indexer_ready", ready_event)
+        monkeypatch.setattr(http_server, "_indexer", VaultIndexer(str(temp_vault)))
+        monkeypatch.setattr(http_server, "_indexer_error", None)
+        encode = mock_st.return_value.encode
+        encode.reset_mock()
+
+        with TestClient(build_app()) as client:
+            first = client.get("/search?q=test+query")
+            second = client.get("/search?q=test+query")
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert first.json()["count"] == 1
+        assert encode.call_count == 1
+
+    def test_search_runs_in_threadpool(self, mock_indexer: MagicMock, client: TestClient) -> None:
         """Sync indexer.search must be awaited via run_in_threadpool so a slow
         query does not block the asyncio event loop.
 
@@ -134,8 +141,6 @@ class TestSearchEndpoint:
         """
         import threading
 
-        import semantic_search.http_server as http_server
-
         main_thread_id = threading.get_ident()
         observed_thread_ids: list[int] = []
 
@@ -143,20 +148,8 @@ class TestSearchEndpoint:
             observed_thread_ids.append(threading.get_ident())
             return [{"path": "a.md", "score": 0.9}]
 
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.search.side_effect = fake_search
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/search?q=hello&top_k=5")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.search.side_effect = fake_search
+        resp = client.get("/search?q=hello&top_k=5")
 
         assert resp.status_code == 200
         assert len(observed_thread_ids) == 1
@@ -165,32 +158,10 @@ class TestSearchEndpoint:
             "to a worker thread via run_in_threadpool"
         )
 
-    def test_search_returns_503_when_not_ready(self) -> None:
+    def test_search_returns_503_when_not_ready(self, not_ready: None, client: TestClient) -> None:
         """While the index is still building, /search returns 503 with a
         Retry-After header — not a 500 and not a hang."""
-        from unittest.mock import patch
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-
-        async def never_completes() -> None:
-            await asyncio.Event().wait()
-
-        try:
-            http_server._indexer_ready = asyncio.Event()  # unset
-            http_server._indexer = None
-            with (
-                patch.object(
-                    http_server, "_build_indexer_in_background", side_effect=never_completes
-                ),
-                TestClient(build_app()) as client,
-            ):
-                resp = client.get("/search?q=hello")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        resp = client.get("/search?q=hello")
         assert resp.status_code == 503
         assert resp.headers.get("retry-after") == "5"
         data = resp.json()
@@ -199,41 +170,26 @@ class TestSearchEndpoint:
 
 
 class TestDuplicatesEndpoint:
-    def test_duplicates_missing_file_returns_400(self) -> None:
-        with TestClient(build_app()) as client:
-            resp = client.get("/duplicates")
+    def test_duplicates_missing_file_returns_400(self, client: TestClient) -> None:
+        resp = client.get("/duplicates")
         assert resp.status_code == 400
         assert "Missing 'file' parameter" in resp.json()["error"]
 
-    def test_duplicates_with_file(self) -> None:
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.find_duplicates.return_value = [{"path": "similar.md", "score": 0.95}]
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/duplicates?file=note.md&threshold=0.9")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+    def test_duplicates_with_file(self, mock_indexer: MagicMock, client: TestClient) -> None:
+        mock_indexer.find_duplicates.return_value = [{"path": "similar.md", "score": 0.95}]
+        resp = client.get("/duplicates?file=note.md&threshold=0.9")
         assert resp.status_code == 200
         data = resp.json()
         assert data["file"] == "note.md"
         assert data["threshold"] == 0.9
         assert data["count"] == 1
 
-    def test_duplicates_runs_in_threadpool(self) -> None:
+    def test_duplicates_runs_in_threadpool(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """Sync indexer.find_duplicates must be awaited via run_in_threadpool."""
         import threading
 
-        import semantic_search.http_server as http_server
-
         main_thread_id = threading.get_ident()
         observed_thread_ids: list[int] = []
 
@@ -241,20 +197,8 @@ class TestDuplicatesEndpoint:
             observed_thread_ids.append(threading.get_ident())
             return [{"path": "similar.md", "score": 0.9}]
 
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.find_duplicates.side_effect = fake_find
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/duplicates?file=note.md")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.find_duplicates.side_effect = fake_find
+        resp = client.get("/duplicates?file=note.md")
 
         assert resp.status_code == 200
         assert len(observed_thread_ids) == 1
@@ -263,29 +207,16 @@ class TestDuplicatesEndpoint:
             "dispatched via run_in_threadpool"
         )
 
-    def test_duplicates_indexer_returns_error_dict_returns_400(self) -> None:
+    def test_duplicates_indexer_returns_error_dict_returns_400(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """Preserves rest_server.py L112-114: when indexer.find_duplicates returns
         a dict with an 'error' key (e.g., file not indexed), the handler must
         forward it as a 400 JSON response, not a 200 success.
         """
-        import semantic_search.http_server as http_server
 
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.find_duplicates.return_value = {
-                "error": "File not found in index: missing.md"
-            }
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/duplicates?file=missing.md")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.find_duplicates.return_value = {"error": "File not found in index: missing.md"}
+        resp = client.get("/duplicates?file=missing.md")
         assert resp.status_code == 400
         data = resp.json()
         assert "error" in data
@@ -293,88 +224,46 @@ class TestDuplicatesEndpoint:
 
 
 class TestReindexEndpoint:
-    def test_reindex_post(self) -> None:
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.meta = {}
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.post("/reindex")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+    def test_reindex_post(self, mock_indexer: MagicMock, client: TestClient) -> None:
+        mock_indexer.meta = {}
+        resp = client.post("/reindex")
         assert resp.status_code == 200
         assert resp.json()["status"] == "ok"
+        # An explicit reindex reads every file, even ones whose mtime is unchanged
+        mock_indexer.rebuild_index.assert_called_once_with(reread=True)
 
 
 class TestContentEndpoint:
     """Tests for GET /content endpoint."""
 
-    def test_content_returns_200_with_full_content(self) -> None:
+    def test_content_returns_200_with_full_content(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """GET /content?path=file returns 200 with path, content, mode fields."""
-        import asyncio
-        from unittest.mock import MagicMock
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.return_value = {
-                "path": "/vault/test.md",
-                "content": "Full content",
-                "mode": "full",
-            }
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content?path=/vault/test.md")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.get_content.return_value = {
+            "path": "/vault/test.md",
+            "content": "Full content",
+            "mode": "full",
+        }
+        resp = client.get("/content?path=/vault/test.md")
         assert resp.status_code == 200
         data = resp.json()
         assert data["path"] == "/vault/test.md"
         assert data["content"] == "Full content"
         assert data["mode"] == "full"
 
-    def test_content_snippet_mode_with_query(self) -> None:
+    def test_content_snippet_mode_with_query(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """GET /content?path=...&snippet=true&query=TOKEN&context_lines=5 returns snippet."""
-        import asyncio
-        from unittest.mock import MagicMock
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.return_value = {
-                "path": "/vault/test.md",
-                "content": "...UNIQUE_TOKEN_XYZ...",
-                "mode": "snippet",
-            }
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get(
-                    "/content?path=/vault/test.md&snippet=true&query=UNIQUE_TOKEN_XYZ&context_lines=5"
-                )
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.get_content.return_value = {
+            "path": "/vault/test.md",
+            "content": "...UNIQUE_TOKEN_XYZ...",
+            "mode": "snippet",
+        }
+        resp = client.get(
+            "/content?path=/vault/test.md&snippet=true&query=UNIQUE_TOKEN_XYZ&context_lines=5"
+        )
         assert resp.status_code == 200
         data = resp.json()
         assert data["mode"] == "snippet"
@@ -382,248 +271,108 @@ class TestContentEndpoint:
             "/vault/test.md", True, "UNIQUE_TOKEN_XYZ", 5
         )
 
-    def test_content_snippet_mode_without_query(self) -> None:
+    def test_content_snippet_mode_without_query(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """GET /content?path=...&snippet=true returns snippet mode with no query."""
-        import asyncio
-        from unittest.mock import MagicMock
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.return_value = {
-                "path": "/vault/test.md",
-                "content": "First lines...",
-                "mode": "snippet",
-            }
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content?path=/vault/test.md&snippet=true")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.get_content.return_value = {
+            "path": "/vault/test.md",
+            "content": "First lines...",
+            "mode": "snippet",
+        }
+        resp = client.get("/content?path=/vault/test.md&snippet=true")
         assert resp.status_code == 200
         data = resp.json()
         assert data["mode"] == "snippet"
         mock_indexer.get_content.assert_called_once_with("/vault/test.md", True, None, 20)
 
-    def test_content_path_outside_roots_returns_400(self) -> None:
+    def test_content_path_outside_roots_returns_400(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """Path outside vault roots returns 400 with PATH_OUTSIDE_ROOTS code."""
-        import asyncio
-        from unittest.mock import MagicMock
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.side_effect = ValueError("path not in indexed roots")
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content?path=/etc/passwd")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.get_content.side_effect = ValueError("path not in indexed roots")
+        resp = client.get("/content?path=/etc/passwd")
         assert resp.status_code == 400
         data = resp.json()
         assert data["error"]["code"] == "PATH_OUTSIDE_ROOTS"
 
-    def test_content_missing_file_returns_404(self) -> None:
+    def test_content_missing_file_returns_404(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """Path inside roots but file missing returns 404 with FILE_NOT_FOUND code."""
-        import asyncio
-        from unittest.mock import MagicMock
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.side_effect = FileNotFoundError("file not found: missing.md")
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content?path=missing.md")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.get_content.side_effect = FileNotFoundError("file not found: missing.md")
+        resp = client.get("/content?path=missing.md")
         assert resp.status_code == 404
         data = resp.json()
         assert data["error"]["code"] == "FILE_NOT_FOUND"
 
-    def test_content_missing_path_param_returns_400(self) -> None:
+    def test_content_missing_path_param_returns_400(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """Missing path param returns 400 with MISSING_PATH code."""
-        import asyncio
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        resp = client.get("/content")
         assert resp.status_code == 400
         data = resp.json()
         assert data["error"]["code"] == "MISSING_PATH"
 
-    def test_content_unreadable_file_returns_422(self) -> None:
+    def test_content_unreadable_file_returns_422(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """Non-UTF-8 file returns 422 with UNREADABLE_FILE code."""
-        import asyncio
-        from unittest.mock import MagicMock
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.side_effect = RuntimeError("could not read file")
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content?path=/vault/binary.bin")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.get_content.side_effect = RuntimeError("could not read file")
+        resp = client.get("/content?path=/vault/binary.bin")
         assert resp.status_code == 422
         data = resp.json()
         assert data["error"]["code"] == "UNREADABLE_FILE"
 
-    def test_content_returns_503_when_not_ready(self) -> None:
+    def test_content_returns_503_when_not_ready(self, not_ready: None, client: TestClient) -> None:
         """Before indexer is ready, /content returns 503 with Retry-After header."""
-        import asyncio
-        from unittest.mock import patch
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-
-        async def never_completes() -> None:
-            await asyncio.Event().wait()
-
-        try:
-            http_server._indexer_ready = asyncio.Event()  # unset
-            http_server._indexer = None
-            with (
-                patch.object(
-                    http_server, "_build_indexer_in_background", side_effect=never_completes
-                ),
-                TestClient(build_app()) as client,
-            ):
-                resp = client.get("/content?path=test.md")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        resp = client.get("/content?path=test.md")
         assert resp.status_code == 503
         assert resp.headers.get("retry-after") == "5"
         data = resp.json()
         assert data["ready"] is False
 
-    def test_content_snippet_param_parses_lowercase_true(self) -> None:
+    def test_content_snippet_param_parses_lowercase_true(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """snippet=true (lowercase) is parsed as True."""
-        import asyncio
-        from unittest.mock import MagicMock
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.return_value = {
-                "path": "/v/test.md",
-                "content": "...",
-                "mode": "snippet",
-            }
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content?path=test.md&snippet=true")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        mock_indexer.get_content.return_value = {
+            "path": "/v/test.md",
+            "content": "...",
+            "mode": "snippet",
+        }
+        resp = client.get("/content?path=test.md&snippet=true")
         assert resp.status_code == 200
         mock_indexer.get_content.assert_called_once_with("test.md", True, None, 20)
 
-    def test_content_snippet_param_parses_false_and_empty_as_false(self) -> None:
+    def test_content_snippet_param_parses_false_and_empty_as_false(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """snippet=false and snippet= (empty) are parsed as False."""
-        import asyncio
-        from unittest.mock import MagicMock
 
-        import semantic_search.http_server as http_server
+        mock_indexer.get_content.return_value = {
+            "path": "/v/test.md",
+            "content": "full",
+            "mode": "full",
+        }
+        # snippet=false
+        resp = client.get("/content?path=test.md&snippet=false")
+        assert resp.status_code == 200
+        mock_indexer.get_content.assert_called_with("test.md", False, None, 20)
 
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            mock_indexer.get_content.return_value = {
-                "path": "/v/test.md",
-                "content": "full",
-                "mode": "full",
-            }
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                # snippet=false
-                resp = client.get("/content?path=test.md&snippet=false")
-                assert resp.status_code == 200
-                mock_indexer.get_content.assert_called_with("test.md", False, None, 20)
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
-
-    def test_content_invalid_context_lines_returns_400(self) -> None:
+    def test_content_invalid_context_lines_returns_400(
+        self, mock_indexer: MagicMock, client: TestClient
+    ) -> None:
         """context_lines=abc returns 400 with INVALID_CONTEXT_LINES code."""
-        import asyncio
-
-        import semantic_search.http_server as http_server
-
-        original_event = http_server._indexer_ready
-        original_indexer = http_server._indexer
-        try:
-            ready_event = asyncio.Event()
-            ready_event.set()
-            http_server._indexer_ready = ready_event
-            mock_indexer = MagicMock()
-            http_server._indexer = mock_indexer
-            with TestClient(build_app()) as client:
-                resp = client.get("/content?path=test.md&context_lines=abc")
-        finally:
-            http_server._indexer_ready = original_event
-            http_server._indexer = original_indexer
+        resp = client.get("/content?path=test.md&context_lines=abc")
         assert resp.status_code == 400
         data = resp.json()
         assert data["error"]["code"] == "INVALID_CONTEXT_LINES"
 
 
 class TestMcpMount:
-    def test_mcp_endpoint_returns_400_for_bare_get_not_404(self) -> None:
+    def test_mcp_endpoint_returns_400_for_bare_get_not_404(self, client: TestClient) -> None:
         """MCP endpoint must be mounted and handled by fastmcp's streamable-http
         transport — NOT routed to Starlette's 404 handler.
 
@@ -637,8 +386,7 @@ class TestMcpMount:
         differences in the exact status code chosen by fastmcp, while proving
         the route is mounted and reaching the MCP handler.
         """
-        with TestClient(build_app()) as client:
-            resp = client.get("/mcp")
+        resp = client.get("/mcp")
         assert resp.status_code in {400, 406}, (
             f"Expected 400 or 406 from mounted MCP handler, got {resp.status_code}. "
             f"A 404 means the route is not mounted; a 405 means the transport "
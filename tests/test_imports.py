@@ -4,6 +4,9 @@ Catches dependency incompatibilities like fastmcp + pydantic version conflicts
 (e.g., 'cannot specify both default and default_factory').
 """
 
+import subprocess
+import sys
+
 
 def test_fastmcp_import() -> None:
     """FastMCP must import without pydantic compatibility errors."""
@@ -13,3 +16,24 @@ def test_fastmcp_import() -> None:
 def test_server_module_import() -> None:
     """Server module must import successfully."""
     from semantic_search import server  # noqa: F401
+
+
+def test_cli_import_does_not_load_model_stack() -> None:
+    """The CLI modules must not import torch/sentence-transformers/FAISS up front,
+    so --help and usage errors stay fast."""
+    code = (
+        "import sys, semantic_search, semantic_search.cli, semantic_search.__main__; "
+        "heavy = {'sentence_transformers', 'torch', 'faiss'} & set(sys.modules); "
+        "sys.exit(sorted(heavy) or 0)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_package_exposes_indexer_lazily() -> None:
+    """`from semantic_search import VaultIndexer` still works."""
+    from semantic_search import VaultIndexer, VaultWatcher
+    from semantic_search.indexer import VaultIndexer as Direct
+
+    assert VaultIndexer is Direct
+    assert VaultWatcher.__name__ == "VaultWatcher"
@@ -3,75 +3,73 @@
 import logging
 import re
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 from unittest.mock import Mock, patch
 
 import numpy as np
 import pytest
 
+if TYPE_CHECKING:
+    from semantic_search.indexer import VaultIndexer
+
+pytestmark = pytest.mark.usefixtures("mock_st")
+
+_FAKE_EMBED = np.full((1, 384), 0.1, dtype=np.float32)
+_FAKE_EMBED.setflags(write=False)
+
+
+def _fake_encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+    """Stand-in for SentenceTransformer.encode: one constant row per input text."""
+    return np.broadcast_to(_FAKE_EMBED, (len(texts), 384))
+
 
 class TestVaultIndexerInit:
     """Tests for VaultIndexer initialization."""
 
     def test_accepts_single_string_path(self, temp_vault: Path) -> None:
         """Test backward compatibility with single string path."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
+        indexer = VaultIndexer(str(temp_vault))
 
-            assert len(indexer.vault_paths) == 1
-            assert indexer.vault_paths[0] == temp_vault
+        assert len(indexer.vault_paths) == 1
+        assert indexer.vault_paths[0] == temp_vault
 
     def test_accepts_list_of_paths(self, multi_vaults: list[Path]) -> None:
         """Test multiple paths as list."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            paths = [str(v) for v in multi_vaults]
-            indexer = VaultIndexer(paths)
+        paths = [str(v) for v in multi_vaults]
+        indexer = VaultIndexer(paths)
 
-            assert len(indexer.vault_paths) == 2
+        assert len(indexer.vault_paths) == 2
 
     def test_creates_unique_index_dir_per_path_combination(self, multi_vaults: list[Path]) -> None:
         """Test different path combinations get different index directories."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer1 = VaultIndexer([str(multi_vaults[0])])
-            indexer2 = VaultIndexer([str(v) for v in multi_vaults])
+        indexer1 = VaultIndexer([str(multi_vaults[0])])
+        indexer2 = VaultIndexer([str(v) for v in multi_vaults])
 
-            # Different paths should have different content hashes (now the hash IS the dir name)
-            assert indexer1.index_dir.name != indexer2.index_dir.name
+        # Different paths should have different content hashes (now the hash IS the dir name)
+        assert indexer1.index_dir.name != indexer2.index_dir.name
 
     def test_index_dir_uses_user_cache_dir(self, temp_vault: Path, tmp_path: Path) -> None:
         """index_dir must live under platformdirs.user_cache_dir, not tempdir."""
         fake_cache_root = tmp_path / "fake_user_cache" / "semantic-search"
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            with patch(
-                "semantic_search.indexer.user_cache_dir",
-                return_value=str(fake_cache_root),
-            ):
-                from semantic_search.indexer import VaultIndexer
+        with patch(
+            "semantic_search.indexer.user_cache_dir",
+            return_value=str(fake_cache_root),
+        ):
+            from semantic_search.indexer import VaultIndexer
 
-                indexer = VaultIndexer(str(temp_vault))
+            indexer = VaultIndexer(str(temp_vault))
 
-            # index_dir = <fake_cache_root>/<8-char-hash>
-            assert str(indexer.index_dir).startswith(str(fake_cache_root))
-            assert indexer.index_dir.parent == fake_cache_root
-            assert len(indexer.index_dir.name) == 8  # md5 truncated to 8 chars
+        # index_dir = <fake_cache_root>/<8-char-hash>
+        assert str(indexer.index_dir).startswith(str(fake_cache_root))
+        assert indexer.index_dir.parent == fake_cache_root
+        assert len(indexer.index_dir.name) == 8  # md5 truncated to 8 chars
 
     def test_expands_tilde_in_paths(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
         """Test tilde (~) is expanded to home directory in paths."""
@@ -86,18 +84,14 @@ class TestVaultIndexerInit:
         # Set HOME to our fake directory
         monkeypatch.setenv("HOME", str(fake_home))
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
+        # Use tilde path - should expand to our fake home
+        indexer = VaultIndexer("~/vault")
 
-            # Use tilde path - should expand to our fake home
-            indexer = VaultIndexer("~/vault")
-
-            # Tilde should be expanded
-            assert indexer.vault_paths[0] == test_vault
-            assert "~" not in str(indexer.vault_paths[0])
+        # Tilde should be expanded
+        assert indexer.vault_paths[0] == test_vault
+        assert "~" not in str(indexer.vault_paths[0])
 
 
 class TestVaultIndexerRebuild:
@@ -105,235 +99,297 @@ class TestVaultIndexerRebuild:
 
     def test_indexes_files_from_all_vaults(self, multi_vaults: list[Path]) -> None:
         """Test rebuild_index scans all configured directories."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            paths = [str(v) for v in multi_vaults]
-            indexer = VaultIndexer(paths)
+        paths = [str(v) for v in multi_vaults]
+        indexer = VaultIndexer(paths)
 
-            # Should have indexed files from both vaults
-            assert len(indexer.meta) == 2
+        # Should have indexed files from both vaults
+        assert len(indexer.meta) == 2
 
-    def test_metadata_does_not_store_content(self, temp_vault: Path) -> None:
-        """Test metadata only stores path, not file content."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+    def test_concurrent_vault_scans_keep_order_and_ignores(self, tmp_path: Path) -> None:
+        """Vaults scanned in parallel are indexed in configured order, each with
+        its own .semanticignore rules."""
+        vaults = [tmp_path / "a", tmp_path / "b"]
+        for vault in vaults:
+            vault.mkdir()
+            (vault / "keep.md").write_text(f"# Keep {vault.name}")
+            (vault / "secret.md").write_text("# Secret")
+        (vaults[1] / ".semanticignore").write_text("secret.md\n")
 
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(temp_vault))
+        indexer = VaultIndexer([str(v) for v in reversed(vaults)])
 
-            for entry in indexer.meta.values():
-                assert "content" not in entry
-                assert "path" in entry
+        paths = [indexer.meta[str(i)]["path"] for i in range(len(indexer.meta))]
+        assert paths[0] == str(vaults[1] / "keep.md")
+        assert set(paths[1:]) == {str(vaults[0] / "keep.md"), str(vaults[0] / "secret.md")}
 
-    def test_modifying_same_file_twice_no_duplicate_entries(self, temp_vault: Path) -> None:
-        """Test modifying a file twice does not create duplicate index entries."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+    def test_rebuild_embeds_all_files_in_one_batch(self, temp_vault: Path, mock_st: Mock) -> None:
+        """rebuild_index must embed every file in a single batched encode() call."""
+        for i in range(9):
+            (temp_vault / f"note{i}.md").write_text(f"# Note {i}\nContent {i}")
 
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import EMBED_BATCH_SIZE, VaultIndexer
 
-            indexer = VaultIndexer(str(temp_vault))
-            initial_count = len(indexer.meta)
+        indexer = VaultIndexer(str(temp_vault))
 
-            # Add the same file twice
-            test_file = temp_vault / "test-note.md"
-            indexer.add_file_to_index(test_file)
-            indexer.add_file_to_index(test_file)
+        encode = mock_st.return_value.encode
+        assert encode.call_count == 1
+        assert {f"note{i}" for i in range(9)} <= set(encode.call_args.args[0])
+        assert encode.call_args.kwargs["batch_size"] == EMBED_BATCH_SIZE
+        assert indexer.index.ntotal == 10
 
-            # Count should not grow — rebuild replaces the entry
-            assert len(indexer.meta) == initial_count
+    def test_rebuild_skips_unparseable_file_and_keeps_order(self, temp_vault: Path) -> None:
+        """A file that fails to parse on a reader thread is skipped; every other
+        file keeps its path-to-row mapping."""
+        for i in range(5):
+            (temp_vault / f"note{i}.md").write_text(f"# Note {i}")
 
+        from semantic_search.indexer import VaultIndexer
 
-class TestVaultIndexerFindDuplicates:
-    """Tests for duplicate detection."""
+        original = VaultIndexer._prepare_parts_for_embedding
 
-    def test_resolves_relative_path_against_all_vaults(self, multi_vaults: list[Path]) -> None:
-        """Test relative paths are checked against all vault directories."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        def flaky(self: VaultIndexer, file_path: Path, content: str) -> list[tuple[int, str]]:
+            if file_path.name == "note2.md":
+                raise RuntimeError("boom")
+            return original(self, file_path, content)
 
-            from semantic_search.indexer import VaultIndexer
+        with patch.object(VaultIndexer, "_prepare_parts_for_embedding", flaky):
+            indexer = VaultIndexer(str(temp_vault))
 
-            paths = [str(v) for v in multi_vaults]
-            indexer = VaultIndexer(paths)
+        indexed = {Path(p).name for p in indexer._path_to_idx}
+        assert "note2.md" not in indexed
+        assert len(indexed) == 5
+        for idx, entry in indexer.meta.items():
+            assert indexer._path_to_idx[entry["path"]] == int(idx)
 
-            # Relative path should be found in second vault
-            result = indexer.find_duplicates("note1.md")
+    def test_rebuild_reuses_cached_embeddings(self, temp_vault: Path, mock_st: Mock) -> None:
+        """A second rebuild over unchanged files must not run the encoder at all;
+        an edited file is the only one re-embedded."""
+        (temp_vault / "other.md").write_text("# Other\nUnchanged content")
 
-            # Should not return error
-            assert not isinstance(result, dict) or "error" not in result
+        from semantic_search.indexer import VaultIndexer
 
+        indexer = VaultIndexer(str(temp_vault))
+        encode = mock_st.return_value.encode
+        encode.reset_mock()
 
-class TestVaultIndexerInlineTags:
-    """Tests for inline tag extraction."""
+        indexer.rebuild_index()
+        assert encode.call_count == 0
+        assert indexer.index.ntotal == 2
 
-    def test_extracts_inline_tags_from_body(self, tmp_path: Path) -> None:
-        """Test inline #tags extracted and merged with frontmatter tags."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        (temp_vault / "other.md").write_text("# Other\nEdited content")
+        indexer.rebuild_index()
+        assert encode.call_count == 1
+        assert len(encode.call_args.args[0]) == 1
 
-            from semantic_search.indexer import VaultIndexer
+    def test_rebuild_skips_unchanged_files(self, temp_vault: Path) -> None:
+        """Files whose mtime and size match their metadata are not read again,
+        an edited file is, and reread=True reads everything."""
+        (temp_vault / "other.md").write_text("# Other\nUnchanged content")
 
-            vault = tmp_path / "vault"
-            vault.mkdir()
+        from semantic_search.indexer import VaultIndexer
 
-            # Create test file with frontmatter tags and inline #tags
-            test_file = vault / "test.md"
-            test_file.write_text("""---
-title: Test Note
-tags: [frontmatter-tag, duplicate]
----
-# Test Note
+        indexer = VaultIndexer(str(temp_vault))
+        before = indexer.search("other", top_k=2)
 
-This note has #inline-tag and #duplicate tags.
-Also testing #EUR/USD format.
-""")
+        with patch.object(indexer, "_read_file", wraps=indexer._read_file) as read:
+            indexer.rebuild_index()
+            assert read.call_count == 0
+            assert indexer.index.ntotal == 2
+            assert indexer.search("other", top_k=2) == before
 
-            indexer = VaultIndexer(str(vault))
+            (temp_vault / "other.md").write_text("# Other\nEdited, longer content")
+            indexer.rebuild_index()
+            assert [c.args[0].name for c in read.call_args_list] == ["other.md"]
 
-            # Verify tags were extracted and merged
-            weighted_text = indexer._prepare_text_for_embedding(test_file, test_file.read_text())
+            read.reset_mock()
+            indexer.rebuild_index(reread=True)
+            assert read.call_count == 2
 
-            # All tags should appear in the weighted text (lowercase, deduplicated)
-            assert "frontmatter-tag" in weighted_text.lower()
-            assert "inline-tag" in weighted_text.lower()
-            assert "eur/usd" in weighted_text.lower()
+    def test_scan_markdown_prunes_directories(self, tmp_path: Path) -> None:
+        """The scan finds nested .md files only, skipping .semantic-search and
+        symlinked directories, and fingerprints each with mtime and size."""
+        from semantic_search.indexer import VaultIndexer
 
-            # Duplicate should only appear once in the merged set
-            # (checking exact count is harder due to weighting, but it should be present)
-            assert "duplicate" in weighted_text.lower()
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        (tmp_path / "a" / "b" / "deep.md").write_text("deep")
+        (tmp_path / "top.md").write_text("top")
+        (tmp_path / "notes.txt").write_text("not markdown")
+        (tmp_path / "folder.md").mkdir()
+        (tmp_path / ".semantic-search").mkdir()
+        (tmp_path / ".semantic-search" / "stale.md").write_text("stale")
+        (tmp_path / "link").symlink_to(tmp_path / "a", target_is_directory=True)
 
-    def test_inline_tag_pattern_ignores_headers(self, tmp_path: Path) -> None:
-        """Test that ## headers are not extracted as tags."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        found = dict(VaultIndexer._scan_markdown(tmp_path))
 
-            from semantic_search.indexer import VaultIndexer
+        assert set(found) == {tmp_path / "top.md", tmp_path / "a" / "b" / "deep.md"}
+        st = (tmp_path / "top.md").stat()
+        assert found[tmp_path / "top.md"] == f"{st.st_mtime_ns}:{st.st_size}"
 
-            vault = tmp_path / "vault"
-            vault.mkdir()
+    def test_metadata_does_not_store_content(self, temp_vault: Path) -> None:
+        """Test metadata only stores path, not file content."""
+        from semantic_search.indexer import VaultIndexer
 
-            test_file = vault / "test.md"
-            test_file.write_text("""# Header One
-## Header Two
+        indexer = VaultIndexer(str(temp_vault))
 
-This has #real-tag but headers are not tags.
-""")
+        for entry in indexer.meta.values():
+            assert "content" not in entry
+            assert "path" in entry
 
-            indexer = VaultIndexer(str(vault))
-            inline_tags = indexer._extract_inline_tags(test_file.read_text())
+    def test_legacy_content_in_cached_metadata_is_dropped(self, temp_vault: Path) -> None:
+        """Metadata from caches that still carry note content loads as path-only."""
+        import json
 
-            # Should only extract #real-tag, not headers
-            assert "real-tag" in inline_tags
-            assert "Header" not in " ".join(inline_tags)
-            assert len(inline_tags) == 1
+        from semantic_search.indexer import VaultIndexer
 
-    def test_frontmatter_single_string_tag(self, tmp_path: Path) -> None:
-        """Test frontmatter tags as single string (not list)."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        indexer = VaultIndexer(str(temp_vault))
+        data = json.loads(indexer.meta_file.read_text())
+        for entry in data["meta"].values():
+            entry["content"] = "x" * 1000
+        indexer.meta_file.write_text(json.dumps(data))
 
-            from semantic_search.indexer import VaultIndexer
+        reloaded = VaultIndexer(str(temp_vault))
 
-            vault = tmp_path / "vault"
-            vault.mkdir()
+        assert reloaded.meta == indexer.meta
+        reloaded.save_index()
+        assert '"content"' not in reloaded.meta_file.read_text()
 
-            test_file = vault / "test.md"
-            test_file.write_text("""---
-tags: single-tag
----
-Content with #inline-tag
-""")
+    def test_modifying_same_file_twice_no_duplicate_entries(self, temp_vault: Path) -> None:
+        """Test modifying a file twice does not create duplicate index entries."""
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(vault))
-            weighted_text = indexer._prepare_text_for_embedding(test_file, test_file.read_text())
+        indexer = VaultIndexer(str(temp_vault))
+        initial_count = len(indexer.meta)
 
-            assert "single-tag" in weighted_text.lower()
-            assert "inline-tag" in weighted_text.lower()
+        # Add the same file twice
+        test_file = temp_vault / "test-note.md"
+        indexer.add_file_to_index(test_file)
+        indexer.add_file_to_index(test_file)
 
-    def test_case_insensitive_deduplication(self, tmp_path: Path) -> None:
-        """Test tags deduplicated case-insensitively."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        # Count should not grow — rebuild replaces the entry
+        assert len(indexer.meta) == initial_count
 
-            from semantic_search.indexer import VaultIndexer
 
-            vault = tmp_path / "vault"
-            vault.mkdir()
+class TestVaultIndexerFindDuplicates:
+    """Tests for duplicate detection."""
 
-            test_file = vault / "test.md"
-            test_file.write_text("""---
-tags: [Project]
----
-Content with #project and #PROJECT
-""")
+    def test_resolves_relative_path_against_all_vaults(self, multi_vaults: list[Path]) -> None:
+        """Test relative paths are checked against all vault directories."""
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(vault))
-            weighted_text = indexer._prepare_text_for_embedding(test_file, test_file.read_text())
+        paths = [str(v) for v in multi_vaults]
+        indexer = VaultIndexer(paths)
 
-            # All variations should be present but deduplicated to lowercase
-            assert "project" in weighted_text.lower()
-            # Count occurrences (difficult due to weighting, so just verify present)
+        # Relative path should be found in second vault
+        result = indexer.find_duplicates("note1.md")
 
-    def test_no_frontmatter_section(self, tmp_path: Path) -> None:
-        """Test file without frontmatter section."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        # Should not return error
+        assert not isinstance(result, dict) or "error" not in result
 
-            from semantic_search.indexer import VaultIndexer
+    def test_returns_all_matches_above_threshold_best_first(
+        self, temp_vault: Path, mock_st: Mock
+    ) -> None:
+        """Every other note above the threshold is returned, highest score first,
+        and notes below it or the file itself are not."""
+        vectors = {
+            "Original": [1.0, 0.0],
+            "Near copy": [0.99, 0.14],
+            "Close copy": [0.95, 0.31],
+            "Unrelated": [0.0, 1.0],
+        }
 
-            vault = tmp_path / "vault"
-            vault.mkdir()
+        def encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            out = np.zeros((len(texts), 384), dtype=np.float32)
+            for row, text in enumerate(texts):
+                out[row, :2] = vectors.get(text, [0.0, 1.0])
+            return out
 
-            test_file = vault / "test.md"
-            test_file.write_text("""# Simple Note
+        for name in vectors:
+            (temp_vault / f"{name}.md").write_text(f"---\ntitle: {name}\n---\n")
+        (temp_vault / "test-note.md").unlink()
 
-No frontmatter here, just #inline-tag and #another-tag.
-""")
+        mock_st.return_value.encode.side_effect = encode
 
-            indexer = VaultIndexer(str(vault))
-            weighted_text = indexer._prepare_text_for_embedding(test_file, test_file.read_text())
+        from semantic_search.indexer import VaultIndexer
 
-            assert "inline-tag" in weighted_text.lower()
-            assert "another-tag" in weighted_text.lower()
+        indexer = VaultIndexer(str(temp_vault), duplicate_threshold=0.85)
+        result = indexer.find_duplicates(temp_vault / "Original.md")
 
-    def test_tags_with_special_chars(self, tmp_path: Path) -> None:
-        """Test tags with hyphens, underscores, and slashes."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        assert isinstance(result, list)
+        assert [Path(r["path"]).stem for r in result] == ["Near copy", "Close copy"]
+        assert result[0]["score"] > result[1]["score"] > 0.85
 
-            from semantic_search.indexer import VaultIndexer
 
-            vault = tmp_path / "vault"
-            vault.mkdir()
+class TestVaultIndexerInlineTags:
+    """Tests for inline tag extraction."""
 
-            test_file = vault / "test.md"
-            test_file.write_text("""---
----
-Testing #test-tag and #test_tag and #EUR/USD
-""")
+    @pytest.mark.parametrize(
+        ("content", "expected_tags"),
+        [
+            pytest.param(
+                "---\ntitle: Test Note\ntags: [frontmatter-tag, duplicate]\n---\n"
+                "# Test Note\n\nThis note has #inline-tag and #duplicate tags.\n"
+                "Also testing #EUR/USD format.\n",
+                "frontmatter-tag duplicate inline-tag eur/usd",
+                id="merged-with-frontmatter-list",
+            ),
+            pytest.param(
+                "---\ntags: single-tag\n---\nContent with #inline-tag\n",
+                "single-tag inline-tag",
+                id="frontmatter-single-string",
+            ),
+            pytest.param(
+                "---\ntags: [Project]\n---\nContent with #project and #PROJECT\n",
+                "project",
+                id="case-insensitive-dedup",
+            ),
+            pytest.param(
+                "# Simple Note\n\nNo frontmatter here, just #inline-tag and #another-tag.\n",
+                "inline-tag another-tag",
+                id="no-frontmatter",
+            ),
+        ],
+    )
+    def test_tags_component(
+        self, parsing_indexer: "VaultIndexer", content: str, expected_tags: str
+    ) -> None:
+        """Frontmatter and inline tags merge into one lowercase, deduplicated
+        weight-2 component in first-seen order."""
+        parts = parsing_indexer._prepare_parts_for_embedding(Path("test.md"), content)
+
+        # The tags component is the first weight-2 part (the H1, if any, follows it)
+        assert next(text for weight, text in parts if weight == 2) == expected_tags
+
+    @pytest.mark.parametrize(
+        ("content", "expected"),
+        [
+            pytest.param(
+                "# Header One\n## Header Two\n\nThis has #real-tag but headers are not tags.\n",
+                ["real-tag"],
+                id="headers-are-not-tags",
+            ),
+            pytest.param(
+                "Testing #test-tag and #test_tag and #EUR/USD\n",
+                ["test-tag", "test_tag", "EUR/USD"],
+                id="hyphens-underscores-slashes",
+            ),
+        ],
+    )
+    def test_extract_inline_tags(
+        self, parsing_indexer: "VaultIndexer", content: str, expected: list[str]
+    ) -> None:
+        """Only #tags are extracted, with hyphens, underscores and slashes kept."""
+        assert parsing_indexer._extract_inline_tags(content) == expected
 
-            indexer = VaultIndexer(str(vault))
-            inline_tags = indexer._extract_inline_tags(test_file.read_text())
+    def test_tag_position_edge_cases(self) -> None:
+        """Tags match at the start of the text and after punctuation or newlines,
+        but not glued to a preceding word character."""
+        from semantic_search.indexer import INLINE_TAG_PATTERN
 
-            assert "test-tag" in inline_tags
-            assert "test_tag" in inline_tags
-            assert "EUR/USD" in inline_tags
-            assert len(inline_tags) == 3
+        text = "#first a#glued (#paren) x_#under\n#line end#"
+        assert INLINE_TAG_PATTERN.findall(text) == ["first", "paren", "line"]
 
 
 class TestVaultIndexerIncremental:
@@ -341,202 +397,647 @@ class TestVaultIndexerIncremental:
 
     def test_add_file_to_index_update_uses_tombstone(self, temp_vault: Path) -> None:
         """Re-adding an existing path tombstones the old idx and appends a new one."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
-            test_file = temp_vault / "test-note.md"
-
-            # Disable compaction so the tombstone produced by the UPDATE path
-            # stays observable. Compaction has its own test
-            # (test_tombstone_compaction_triggers_rebuild); here we only care
-            # that the UPDATE path tombstones the old idx and never calls
-            # rebuild_index itself.
-            indexer._maybe_compact = lambda: None  # type: ignore[method-assign]
-
-            rebuild_calls: list[int] = []
-            indexer.rebuild_index = lambda: rebuild_calls.append(1)  # type: ignore[method-assign]
-
-            before_idx = indexer._path_to_idx[str(test_file)]
-            indexer.add_file_to_index(test_file)  # update path
-            after_idx = indexer._path_to_idx[str(test_file)]
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        test_file = temp_vault / "test-note.md"
+
+        # Disable compaction so the tombstone produced by the UPDATE path
+        # stays observable. Compaction has its own test
+        # (test_tombstone_compaction_triggers_rebuild); here we only care
+        # that the UPDATE path tombstones the old idx and never calls
+        # rebuild_index itself.
+        indexer._maybe_compact = lambda: None  # type: ignore[method-assign]
+
+        rebuild_calls: list[int] = []
+        indexer.rebuild_index = lambda: rebuild_calls.append(1)  # type: ignore[method-assign]
+
+        before_idx = indexer._path_to_idx[str(test_file)]
+        test_file.write_text("# Test Note\nEdited body")
+        indexer.add_file_to_index(test_file)  # update path
+        after_idx = indexer._path_to_idx[str(test_file)]
+
+        assert after_idx != before_idx
+        assert before_idx in indexer._tombstones
+        # UPDATE path must never call rebuild_index directly — only
+        # _maybe_compact may, and we've stubbed it out above.
+        assert rebuild_calls == []
+
+    def test_unchanged_file_is_not_reindexed(self, temp_vault: Path) -> None:
+        """Re-adding a file whose content did not change (editor re-save, mtime
+        bump) neither parses, embeds nor saves."""
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        test_file = temp_vault / "test-note.md"
+        before_idx = indexer._path_to_idx[str(test_file)]
+        test_file.write_text(test_file.read_text())
+
+        with (
+            patch.object(indexer, "_prepare_parts_for_embedding") as prepare,
+            patch.object(indexer, "_embed_documents") as embed,
+            patch.object(indexer, "save_index") as save,
+        ):
+            indexer.add_file_to_index(test_file)
 
-            assert after_idx != before_idx
-            assert before_idx in indexer._tombstones
-            # UPDATE path must never call rebuild_index directly — only
-            # _maybe_compact may, and we've stubbed it out above.
-            assert rebuild_calls == []
+        prepare.assert_not_called()
+        embed.assert_not_called()
+        save.assert_not_called()
+        assert indexer._path_to_idx[str(test_file)] == before_idx
+        assert indexer._tombstones == set()
 
     def test_remove_file_from_index(self, temp_vault: Path) -> None:
         """Removed files disappear from meta and are tombstoned."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
+        indexer = VaultIndexer(str(temp_vault))
+        test_file = temp_vault / "test-note.md"
+        idx = indexer._path_to_idx[str(test_file)]
 
-            indexer = VaultIndexer(str(temp_vault))
-            test_file = temp_vault / "test-note.md"
-            idx = indexer._path_to_idx[str(test_file)]
+        # Delete from disk first — the realistic call site. Without this,
+        # _maybe_compact would trigger rebuild which re-indexes the still-present file.
+        test_file.unlink()
+        indexer.remove_file_from_index(test_file)
 
-            # Delete from disk first — the realistic call site. Without this,
-            # _maybe_compact would trigger rebuild which re-indexes the still-present file.
-            test_file.unlink()
-            indexer.remove_file_from_index(test_file)
-
-            assert str(test_file) not in indexer._path_to_idx
-            assert str(idx) not in indexer.meta
-            # Tombstone set OR compaction cleared it — both are correct end states.
-            # If compaction ran (1 dead / 1 total = 100%), tombstones are empty.
-            # If not, the removed idx is tombstoned. Assert one of these holds:
-            assert idx in indexer._tombstones or len(indexer._tombstones) == 0
+        assert str(test_file) not in indexer._path_to_idx
+        assert str(idx) not in indexer.meta
+        # Tombstone set OR compaction cleared it — both are correct end states.
+        # If compaction ran (1 dead / 1 total = 100%), tombstones are empty.
+        # If not, the removed idx is tombstoned. Assert one of these holds:
+        assert idx in indexer._tombstones or len(indexer._tombstones) == 0
 
     def test_remove_nonexistent_path_is_noop(self, temp_vault: Path) -> None:
         """Removing a path that isn't indexed does not raise or mutate state."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(temp_vault))
-            before = dict(indexer.meta)
+        indexer = VaultIndexer(str(temp_vault))
+        before = dict(indexer.meta)
 
-            indexer.remove_file_from_index("/nowhere/missing.md")
+        indexer.remove_file_from_index("/nowhere/missing.md")
 
-            assert indexer.meta == before
+        assert indexer.meta == before
 
     def test_search_filters_tombstones(self, temp_vault: Path) -> None:
         """Tombstoned entries never appear in search results."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
+
+        # Fresh vault with 10 files so removing one is only 10% tombstones
+        # (below the 20% compaction threshold).
+        vault = temp_vault
+        for i in range(9):
+            (vault / f"note{i}.md").write_text(f"# Note {i}\nContent {i}")
+
+        indexer = VaultIndexer(str(vault))
+        target = vault / "note3.md"
+        target_idx = indexer._path_to_idx[str(target)]
+
+        # Manually tombstone without triggering compaction path
+        with indexer._index_lock:
+            indexer._tombstones.add(target_idx)
+            indexer.meta.pop(str(target_idx), None)
+            indexer._path_to_idx.pop(str(target), None)
+
+        results = indexer.search("anything", top_k=100)
+        paths = [r["path"] for r in results]
+        assert str(target) not in paths
+
+    def test_update_during_rebuild_is_not_lost(self, temp_vault: Path, mock_st: Mock) -> None:
+        """A flush that races a rebuild waits for it instead of being swapped away."""
+        import threading
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        embedding = threading.Event()
+        release = threading.Event()
+
+        def slow_encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            if not embedding.is_set():  # only the rebuild's encode blocks
+                embedding.set()
+                release.wait(timeout=5)
+            return _fake_encode(texts)
+
+        # Clear the cache so the rebuild has to encode (and block)
+        indexer._embedding_cache.retain(set())
+        mock_st.return_value.encode.side_effect = slow_encode
+        rebuild = threading.Thread(target=indexer.rebuild_index)
+        rebuild.start()
+        assert embedding.wait(timeout=5)
+
+        # Created after the rebuild collected its file list
+        new_note = temp_vault / "late-note.md"
+        new_note.write_text("# Late note\nWritten mid-rebuild")
+        update = threading.Thread(target=indexer.add_file_to_index, args=(new_note,))
+        update.start()
+        update.join(timeout=0.5)  # give an unserialized update time to finish
+        release.set()
+        rebuild.join(timeout=5)
+        update.join(timeout=5)
+
+        assert str(new_note) in indexer._path_to_idx
+        paths = [r["path"] for r in indexer.search("late", top_k=100)]
+        assert str(new_note) in paths
 
-            from semantic_search.indexer import VaultIndexer
+    def test_compaction_triggers_when_tombstone_ratio_exceeds_threshold(
+        self, temp_vault: Path
+    ) -> None:
+        """_maybe_compact must call rebuild_index when tombstones > 20% and the
+        index cannot drop rows in place (HNSW)."""
+        from semantic_search.indexer import VaultIndexer
 
-            # Fresh vault with 10 files so removing one is only 10% tombstones
-            # (below the 20% compaction threshold).
-            vault = temp_vault
-            for i in range(9):
-                (vault / f"note{i}.md").write_text(f"# Note {i}\nContent {i}")
+        vault = temp_vault
+        for i in range(9):
+            (vault / f"note{i}.md").write_text(f"# Note {i}")
 
-            indexer = VaultIndexer(str(vault))
-            target = vault / "note3.md"
-            target_idx = indexer._path_to_idx[str(target)]
+        indexer = VaultIndexer(str(vault), index_type="hnsw")
 
-            # Manually tombstone without triggering compaction path
-            with indexer._index_lock:
-                indexer._tombstones.add(target_idx)
-                indexer.meta.pop(str(target_idx), None)
-                indexer._path_to_idx.pop(str(target), None)
+        rebuild_calls: list[int] = []
+        indexer.rebuild_index = lambda: rebuild_calls.append(1)  # type: ignore[method-assign]
 
-            results = indexer.search("anything", top_k=100)
-            paths = [r["path"] for r in results]
-            assert str(target) not in paths
+        # Force 30% tombstones (3 of 10): compaction MUST fire
+        idxs = list(indexer._path_to_idx.values())[:3]
+        with indexer._index_lock:
+            for idx in idxs:
+                indexer._tombstones.add(idx)
 
-    def test_compaction_triggers_when_tombstone_ratio_exceeds_threshold(
-        self, temp_vault: Path
-    ) -> None:
-        """_maybe_compact must call rebuild_index when tombstones > 20%."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        indexer._maybe_compact()
 
-            from semantic_search.indexer import VaultIndexer
+        assert len(rebuild_calls) == 1
+
+    def test_flat_index_is_compacted_in_place(self, temp_vault: Path, mock_st: Mock) -> None:
+        """A flat index drops tombstoned rows without re-reading the vault, and
+        surviving notes keep resolving to the right rows, also after a restart."""
 
-            vault = temp_vault
-            for i in range(9):
-                (vault / f"note{i}.md").write_text(f"# Note {i}")
+        def encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            out = np.zeros((len(texts), 384), dtype=np.float32)
+            for row, text in enumerate(texts):
+                out[row, sum(map(ord, text)) % 384] = 1.0
+            return out
 
-            indexer = VaultIndexer(str(vault))
+        mock_st.return_value.encode.side_effect = encode
 
-            rebuild_calls: list[int] = []
-            indexer.rebuild_index = lambda: rebuild_calls.append(1)  # type: ignore[method-assign]
+        from semantic_search.indexer import VaultIndexer
 
-            # Force 30% tombstones (3 of 10): compaction MUST fire
-            idxs = list(indexer._path_to_idx.values())[:3]
-            with indexer._index_lock:
-                for idx in idxs:
-                    indexer._tombstones.add(idx)
+        vault = temp_vault
+        for i in range(9):
+            (vault / f"note{i}.md").write_text(f"# Note {i}")
 
-            indexer._maybe_compact()
+        indexer = VaultIndexer(str(vault))
+        rebuild_calls: list[int] = []
+        indexer.rebuild_index = lambda: rebuild_calls.append(1)  # type: ignore[method-assign]
 
-            assert len(rebuild_calls) == 1
+        before = {p: indexer.index.reconstruct(i) for p, i in indexer._path_to_idx.items()}
+        removed = [vault / f"note{i}.md" for i in range(3)]
+        for path in removed:
+            path.unlink()
+        indexer.update_files(removed=removed)  # 30% tombstones: compacts
+
+        assert rebuild_calls == []
+        assert indexer._tombstones == set()
+        assert indexer.index.ntotal == 7
+        assert sorted(int(idx) for idx in indexer.meta) == list(range(7))
+        for path_str, idx in indexer._path_to_idx.items():
+            assert indexer.meta[str(idx)]["path"] == path_str
+            np.testing.assert_array_equal(indexer.index.reconstruct(idx), before[path_str])
+
+        reloaded = VaultIndexer(str(vault))
+        assert reloaded.meta == indexer.meta
+        assert reloaded.index.ntotal == 7
 
     def test_compaction_does_not_trigger_below_threshold(self, temp_vault: Path) -> None:
         """_maybe_compact must NOT call rebuild_index when tombstones <= 20%."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
+        vault = temp_vault
+        for i in range(19):
+            (vault / f"note{i}.md").write_text(f"# Note {i}")
 
-            vault = temp_vault
-            for i in range(19):
-                (vault / f"note{i}.md").write_text(f"# Note {i}")
+        indexer = VaultIndexer(str(vault))
 
-            indexer = VaultIndexer(str(vault))
+        rebuild_calls: list[int] = []
+        indexer.rebuild_index = lambda: rebuild_calls.append(1)  # type: ignore[method-assign]
 
-            rebuild_calls: list[int] = []
-            indexer.rebuild_index = lambda: rebuild_calls.append(1)  # type: ignore[method-assign]
+        # 10% tombstones (2 of 20): below threshold
+        idxs = list(indexer._path_to_idx.values())[:2]
+        with indexer._index_lock:
+            for idx in idxs:
+                indexer._tombstones.add(idx)
 
-            # 10% tombstones (2 of 20): below threshold
-            idxs = list(indexer._path_to_idx.values())[:2]
-            with indexer._index_lock:
-                for idx in idxs:
-                    indexer._tombstones.add(idx)
+        indexer._maybe_compact()
 
-            indexer._maybe_compact()
+        assert rebuild_calls == []
 
-            assert rebuild_calls == []
-
-    def test_index_cache_survives_restart(self, temp_vault: Path) -> None:
+    def test_index_cache_survives_restart(self, temp_vault: Path, mock_st: Mock) -> None:
         """A second VaultIndexer with the same paths loads the on-disk cache
         without re-embedding every file. With PID removed from index_dir, the
         second instantiation must find and load the existing index.
         """
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
+
+        indexer1 = VaultIndexer(str(temp_vault))
+        assert indexer1.index_file.exists()
+        files_embedded_first_run = mock_st.return_value.encode.call_count
+
+        # Second instantiation of a fresh indexer against the same paths
+        indexer2 = VaultIndexer(str(temp_vault))
+        files_embedded_second_run = mock_st.return_value.encode.call_count
+
+        # Second instantiation must NOT re-embed (cache hit)
+        assert files_embedded_second_run == files_embedded_first_run
+        assert len(indexer2.meta) == len(indexer1.meta)
+        assert indexer2.index_dir == indexer1.index_dir  # no PID path component
+
+    @pytest.mark.parametrize(
+        "old_recipe",
+        [
+            pytest.param({"NOTE_VECTOR_SCHEME": 0}, id="vector-scheme"),
+            pytest.param({"BODY_MAX_WORDS": 100}, id="body-max-words"),
+        ],
+    )
+    def test_index_saved_under_old_recipe_is_rebuilt(
+        self, temp_vault: Path, old_recipe: dict[str, int]
+    ) -> None:
+        """Vectors embedded by another recipe are recomputed on load instead of
+        being mixed with new ones."""
+        import json
 
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import NOTE_VECTOR_SCHEME, VaultIndexer
+
+        name, value = next(iter(old_recipe.items()))
+        with patch(f"semantic_search.indexer.{name}", value):
+            old = VaultIndexer(str(temp_vault))
+
+        with patch.object(
+            VaultIndexer, "rebuild_index", autospec=True, side_effect=VaultIndexer.rebuild_index
+        ) as rebuild:
+            rebuilt = VaultIndexer(str(temp_vault))
+
+        rebuild.assert_called_once()
+        data = json.loads(rebuilt.meta_file.read_text())
+        assert data["vector_scheme"] == NOTE_VECTOR_SCHEME
+        assert data["body_max_words"] == rebuilt._body_max_words
+        assert len(rebuilt.meta) == len(old.meta)
 
-            indexer1 = VaultIndexer(str(temp_vault))
-            assert indexer1.index_file.exists()
-            files_embedded_first_run = mock_st.return_value.encode.call_count
+    def test_bare_dict_meta_file_is_rebuilt(self, temp_vault: Path) -> None:
+        """The old bare-dict metadata format records no recipe, so it is rebuilt."""
+        import json
 
-            # Second instantiation of a fresh indexer against the same paths
-            indexer2 = VaultIndexer(str(temp_vault))
-            files_embedded_second_run = mock_st.return_value.encode.call_count
+        from semantic_search.indexer import VaultIndexer
 
-            # Second instantiation must NOT re-embed (cache hit)
-            assert files_embedded_second_run == files_embedded_first_run
-            assert len(indexer2.meta) == len(indexer1.meta)
-            assert indexer2.index_dir == indexer1.index_dir  # no PID path component
+        indexer = VaultIndexer(str(temp_vault))
+        indexer.meta_file.write_text(json.dumps({"0": {"path": "/gone.md"}}))
+
+        rebuilt = VaultIndexer(str(temp_vault))
+
+        assert "/gone.md" not in rebuilt._path_to_idx
+        assert rebuilt.meta == indexer.meta
+        assert "vector_scheme" in json.loads(rebuilt.meta_file.read_text())
 
     def test_meta_file_format_loads_tombstones(self, temp_vault: Path) -> None:
         """save_index writes tombstones; _load_index reads them back."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
+
+        vault = temp_vault
+        for i in range(9):
+            (vault / f"note{i}.md").write_text(f"# Note {i}")
+
+        indexer1 = VaultIndexer(str(vault))
+        target_idx = next(iter(indexer1._path_to_idx.values()))
+        with indexer1._index_lock:
+            indexer1._tombstones.add(target_idx)
+        indexer1.save_index()
+
+        indexer2 = VaultIndexer(str(vault))
+        assert target_idx in indexer2._tombstones
+
+
+class TestIncrementalSave:
+    """Tests for appending vectors to a tail file and metadata to a journal
+    instead of rewriting the index and metadata on every save."""
+
+    def test_add_appends_tail_instead_of_rewriting_index(self, temp_vault: Path) -> None:
+        """Adding a file writes only its vector (and its new cache rows); a fresh
+        indexer sees it."""
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        cache_file = indexer._embedding_cache.vectors_file
+        cache_mtime = cache_file.stat().st_mtime_ns
+        new_file = temp_vault / "new.md"
+        new_file.write_text("# New")
+
+        with patch("semantic_search.indexer.faiss.write_index") as write_index:
+            indexer.add_file_to_index(new_file)
+
+        write_index.assert_not_called()
+        assert indexer.tail_file.stat().st_size == 384 * 4
+        assert cache_file.stat().st_mtime_ns == cache_mtime
+        assert indexer._embedding_cache.tail_file.exists()
+
+        reloaded = VaultIndexer(str(temp_vault))
+        assert reloaded.index.ntotal == 2
+        assert reloaded._path_to_idx[str(new_file)] == 1
+
+    def test_metadata_changes_are_journaled_not_rewritten(self, temp_vault: Path) -> None:
+        """Incremental saves append to the journal; a fresh indexer replays it."""
+        for i in range(9):
+            (temp_vault / f"note{i}.md").write_text(f"# Note {i}")
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        snapshot = indexer.meta_file.read_text()
+        new_file = temp_vault / "new.md"
+        new_file.write_text("# New")
+        indexer.add_file_to_index(new_file)
+        indexer.remove_file_from_index(temp_vault / "note0.md")
+
+        assert indexer.meta_file.read_text() == snapshot
+        assert len(indexer.journal_file.read_text().splitlines()) == 2
+
+        reloaded = VaultIndexer(str(temp_vault))
+        assert reloaded.meta == indexer.meta
+        assert reloaded._tombstones == indexer._tombstones
+        assert reloaded._path_to_idx == indexer._path_to_idx
+
+    def test_stale_and_torn_journal_lines_are_ignored(self, temp_vault: Path) -> None:
+        """Journal lines from an older snapshot and a half-written last line
+        (interrupted saves) do not touch the loaded metadata."""
+        import json
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        stale = {
+            "generation": indexer._generation - 1,
+            "added": {"5": {"path": "/stale.md"}},
+            "removed": [0],
+            "tail_rows": 0,
+        }
+        indexer.journal_file.write_text(json.dumps(stale) + '\n{"generation": ')
+
+        reloaded = VaultIndexer(str(temp_vault))
+
+        assert reloaded.meta == indexer.meta
+        assert reloaded._tombstones == set()
+
+    def test_tail_is_folded_into_index_past_limit(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Once the tail exceeds SAVE_TAIL_MAX_VECTORS the FAISS file is rewritten."""
+        monkeypatch.setattr("semantic_search.indexer.SAVE_TAIL_MAX_VECTORS", 1)
 
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        for i in range(2):
+            path = temp_vault / f"new{i}.md"
+            path.write_text(f"# New {i}")
+            indexer.add_file_to_index(path)
+
+        assert not indexer.tail_file.exists()
+        assert not indexer.journal_file.exists()
+        assert VaultIndexer(str(temp_vault)).index.ntotal == 3
+
+    def test_rows_from_interrupted_save_are_dropped(self, temp_vault: Path) -> None:
+        """Tail rows the meta file does not know about are truncated on load."""
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        new_file = temp_vault / "new.md"
+        new_file.write_text("# New")
+        indexer.add_file_to_index(new_file)
+        # Simulate a crash after the tail append but before the meta write
+        with open(indexer.tail_file, "ab") as f:
+            f.write(np.ones(384, dtype=np.float32).tobytes())
+
+        reloaded = VaultIndexer(str(temp_vault))
+
+        assert reloaded.index.ntotal == 2
+        assert reloaded.tail_file.stat().st_size == 384 * 4
+
+    def test_two_processes_never_interleave_appends(self, temp_vault: Path, mock_st: Mock) -> None:
+        """When another indexer over the same index_dir (e.g. MCP and HTTP server)
+        has saved since this one loaded, saving rewrites instead of appending,
+        so every path on disk keeps its own vector."""
+        import zlib
+
+        def encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            return np.stack(
+                [np.random.default_rng(zlib.crc32(t.encode())).random(384) for t in texts]
+            ).astype(np.float32)
+
+        mock_st.return_value.encode.side_effect = encode
+
+        from semantic_search.indexer import VaultIndexer
+
+        first = VaultIndexer(str(temp_vault))
+        second = VaultIndexer(str(temp_vault))
+        for i, writer in enumerate([first, second, first]):
+            path = temp_vault / f"new{i}.md"
+            path.write_text(f"# New {i}\nBody {i}")
+            writer.add_file_to_index(path)
+
+            reloaded = VaultIndexer(str(temp_vault))
+            assert reloaded._path_to_idx.keys() == writer._path_to_idx.keys()
+            for path_str, idx in reloaded._path_to_idx.items():
+                np.testing.assert_allclose(
+                    reloaded.index.reconstruct(idx),
+                    writer.index.reconstruct(writer._path_to_idx[path_str]),
+                )
+
+
+class TestSearchBatching:
+    """Tests for serving concurrent searches in batches."""
+
+    def test_search_many_matches_individual_searches(self, temp_vault: Path) -> None:
+        """search_many returns, per query, what search would return."""
+        from semantic_search.indexer import VaultIndexer
+
+        for i in range(4):
+            (temp_vault / f"note{i}.md").write_text(f"# Note {i}")
+        indexer = VaultIndexer(str(temp_vault))
+
+        batched = indexer.search_many(["a", "b"], top_k=3)
+        single = indexer.search("a", top_k=3)
+
+        assert len(batched) == 2
+        assert [len(r) for r in batched] == [3, 3]
+        assert batched[0] == single
+
+    def test_concurrent_searches_share_one_encode(self, temp_vault: Path, mock_st: Mock) -> None:
+        """Queries arriving while a search runs are answered by a single batch."""
+        import threading
+        import time
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        started = threading.Event()
+        release = threading.Event()
+        encoded: list[list[str]] = []
+
+        def encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            encoded.append(list(texts))
+            started.set()
+            release.wait(timeout=5)
+            return _fake_encode(texts)
+
+        mock_st.return_value.encode.side_effect = encode
+        results: dict[str, list[dict[str, Any]]] = {}
+
+        def run(query: str, top_k: int) -> None:
+            results[query] = indexer.search(query, top_k=top_k)
+
+        leader = threading.Thread(target=run, args=("first", 1))
+        leader.start()
+        assert started.wait(timeout=5)
+        followers = [
+            threading.Thread(target=run, args=(q, k))
+            for q, k in (("second", 1), ("third", 2), ("fourth", 1))
+        ]
+        for t in followers:
+            t.start()
+        deadline = time.monotonic() + 5
+        while len(indexer._search_queue) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for t in [leader, *followers]:
+            t.join(timeout=5)
+
+        assert len(encoded) == 2
+        assert encoded[0] == ["first"]
+        assert sorted(encoded[1]) == ["fourth", "second", "third"]
+        assert set(results) == {"first", "second", "third", "fourth"}
+        assert all(len(r) == 1 for r in results.values())  # only test-note.md is indexed
+        assert not indexer._search_leader_active
+
+    @pytest.mark.parametrize("leader_fails", [False, True])
+    def test_leader_hands_over_after_its_own_batch(
+        self, temp_vault: Path, mock_st: Mock, leader_fails: bool
+    ) -> None:
+        """The leader returns once its own query is answered, and the queries
+        that arrived meanwhile are served on one of their own threads, also when
+        the leader dies with a BaseException."""
+        import threading
+        import time
+
+        from semantic_search.indexer import VaultIndexer
+
+        class Abort(BaseException):
+            pass
+
+        indexer = VaultIndexer(str(temp_vault))
+        started = threading.Event()
+        release = threading.Event()
+        encoded_on: dict[str, str] = {}
+
+        def encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            for text in texts:
+                encoded_on[text] = threading.current_thread().name
+            if texts == ["first"]:
+                started.set()
+                release.wait(timeout=5)
+                if leader_fails:
+                    raise Abort
+            return _fake_encode(texts)
+
+        mock_st.return_value.encode.side_effect = encode
+        results: dict[str, Any] = {}
+
+        def run(query: str) -> None:
+            try:
+                results[query] = indexer.search(query)
+            except Abort as e:
+                results[query] = e
+
+        # Daemon threads: a stranded follower fails the assertions instead of hanging
+        threads = [threading.Thread(target=run, args=("first",), name="first", daemon=True)]
+        threads[0].start()
+        assert started.wait(timeout=5)
+        for query in ("second", "third"):
+            threads.append(threading.Thread(target=run, args=(query,), name=query, daemon=True))
+            threads[-1].start()
+        deadline = time.monotonic() + 5
+        while len(indexer._search_queue) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert not any(t.is_alive() for t in threads)
+        assert isinstance(results["first"], Abort) is leader_fails
+        assert len(results["second"]) == len(results["third"]) == 1
+        assert encoded_on["second"] in ("second", "third")
+        assert encoded_on["second"] == encoded_on["third"]
+        assert not indexer._search_leader_active
+
+    def test_repeated_query_is_encoded_once(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch, mock_st: Mock
+    ) -> None:
+        """Recent query embeddings are reused; the oldest is evicted past the limit."""
+        import semantic_search.indexer as indexer_module
+
+        monkeypatch.setattr(indexer_module, "QUERY_CACHE_SIZE", 2)
+        indexer = indexer_module.VaultIndexer(str(temp_vault))
+        encoded: list[list[str]] = []
+
+        def encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            encoded.append(list(texts))
+            return _fake_encode(texts)
 
-            vault = temp_vault
-            for i in range(9):
-                (vault / f"note{i}.md").write_text(f"# Note {i}")
+        mock_st.return_value.encode.side_effect = encode
 
-            indexer1 = VaultIndexer(str(vault))
-            target_idx = next(iter(indexer1._path_to_idx.values()))
-            with indexer1._index_lock:
-                indexer1._tombstones.add(target_idx)
-            indexer1.save_index()
+        first = indexer.search("same")
+        assert indexer.search("same") == first
+        indexer.search_many(["same", "other", "other"])
+        indexer.search("third")  # evicts "same", the least recently used
+        indexer.search("same")
 
-            indexer2 = VaultIndexer(str(vault))
-            assert target_idx in indexer2._tombstones
+        assert encoded == [["same"], ["other"], ["third"], ["same"]]
+        assert list(indexer._query_cache) == ["third", "same"]
+
+
+class TestMmapIndex:
+    """Tests for memory-mapping a cached index (the default)."""
+
+    def test_mmapped_index_searches_and_accepts_writes(self, temp_vault: Path) -> None:
+        """A mapped index answers searches, and adding a file first copies it into
+        memory instead of writing through the read-only mapping."""
+        from semantic_search.indexer import VaultIndexer
+
+        VaultIndexer(str(temp_vault))  # builds and saves the index
+        indexer = VaultIndexer(str(temp_vault))
+        assert indexer._index_is_mmapped
+        assert len(indexer.search("test")) == 1
+
+        new_file = temp_vault / "new.md"
+        new_file.write_text("# New\nFresh note")
+        indexer.add_file_to_index(new_file)
+
+        assert not indexer._index_is_mmapped
+        assert indexer.index.ntotal == 2
+        assert {r["path"] for r in indexer.search("note")} == {
+            str(temp_vault / "test-note.md"),
+            str(new_file),
+        }
+
+    def test_full_save_does_not_disturb_other_mappings(self, temp_vault: Path) -> None:
+        """A rebuild in one process replaces the index file instead of rewriting
+        it in place, so another process's mapping stays readable."""
+        from semantic_search.indexer import VaultIndexer
+
+        VaultIndexer(str(temp_vault))  # builds and saves the index
+        reader = VaultIndexer(str(temp_vault))
+        writer = VaultIndexer(str(temp_vault))
+        assert reader._index_is_mmapped
+        old_inode = reader.index_file.stat().st_ino
+
+        (temp_vault / "other.md").write_text("# Other\nAnother note")
+        writer.rebuild_index()
+
+        assert reader.index_file.stat().st_ino != old_inode
+        assert [r["path"] for r in reader.search("test")] == [str(temp_vault / "test-note.md")]
 
 
 class TestCacheMigration:
@@ -550,8 +1051,11 @@ class TestCacheMigration:
         both files now live at the new location and the old ones are gone.
         """
         import hashlib
+        import json
         import tempfile
 
+        from semantic_search.indexer import BODY_MAX_WORDS, NOTE_VECTOR_SCHEME
+
         fake_cache_root = tmp_path / "fake_user_cache" / "semantic-search"
 
         # Reproduce the same hash the indexer will compute for temp_vault
@@ -564,24 +1068,21 @@ class TestCacheMigration:
         old_faiss = old_dir / "vector_index.faiss"
         # Minimal valid meta JSON (empty index) — matches the format
         # _load_index writes via save_index.
-        old_meta.write_text('{"meta": {}, "tombstones": []}')
+        recipe = {"vector_scheme": NOTE_VECTOR_SCHEME, "body_max_words": BODY_MAX_WORDS}
+        old_meta.write_text(json.dumps({"meta": {}, "tombstones": [], **recipe}))
         old_faiss.write_bytes(b"\x00\x01\x02\x03FAKE_FAISS")
 
         try:
-            with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-                mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-                mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-                # Mock faiss.read_index so we don't try to parse the fake bytes
-                with patch("semantic_search.indexer.faiss.read_index") as mock_read:
-                    mock_read.return_value = Mock(ntotal=0)
-                    with patch(
-                        "semantic_search.indexer.user_cache_dir",
-                        return_value=str(fake_cache_root),
-                    ):
-                        from semantic_search.indexer import VaultIndexer
+            # Mock faiss.read_index so we don't try to parse the fake bytes
+            with patch("semantic_search.indexer.faiss.read_index") as mock_read:
+                mock_read.return_value = Mock(ntotal=0)
+                with patch(
+                    "semantic_search.indexer.user_cache_dir",
+                    return_value=str(fake_cache_root),
+                ):
+                    from semantic_search.indexer import VaultIndexer
 
-                        indexer = VaultIndexer(str(temp_vault))
+                    indexer = VaultIndexer(str(temp_vault))
 
             new_meta = fake_cache_root / content_hash / "index_meta.json"
             new_faiss = fake_cache_root / content_hash / "vector_index.faiss"
@@ -603,8 +1104,11 @@ class TestCacheMigration:
         """If the new cache dir already has index_meta.json, old tempdir files
         are left untouched — the new location wins."""
         import hashlib
+        import json
         import tempfile
 
+        from semantic_search.indexer import BODY_MAX_WORDS, NOTE_VECTOR_SCHEME
+
         fake_cache_root = tmp_path / "fake_user_cache" / "semantic-search"
 
         paths_str = str(temp_vault.resolve())
@@ -620,24 +1124,23 @@ class TestCacheMigration:
         new_dir = fake_cache_root / content_hash
         new_dir.mkdir(parents=True, exist_ok=True)
         new_meta = new_dir / "index_meta.json"
-        new_meta.write_text('{"meta": {"0": {"path": "/new"}}, "tombstones": []}')
+        recipe = {"vector_scheme": NOTE_VECTOR_SCHEME, "body_max_words": BODY_MAX_WORDS}
+        new_meta.write_text(
+            json.dumps({"meta": {"0": {"path": "/new"}}, "tombstones": [], **recipe})
+        )
         new_faiss = new_dir / "vector_index.faiss"
         new_faiss.write_bytes(b"NEWFAISS")
 
         try:
-            with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-                mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-                mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-                with patch("semantic_search.indexer.faiss.read_index") as mock_read:
-                    mock_read.return_value = Mock(ntotal=1)
-                    with patch(
-                        "semantic_search.indexer.user_cache_dir",
-                        return_value=str(fake_cache_root),
-                    ):
-                        from semantic_search.indexer import VaultIndexer
+            with patch("semantic_search.indexer.faiss.read_index") as mock_read:
+                mock_read.return_value = Mock(ntotal=1)
+                with patch(
+                    "semantic_search.indexer.user_cache_dir",
+                    return_value=str(fake_cache_root),
+                ):
+                    from semantic_search.indexer import VaultIndexer
 
-                        VaultIndexer(str(temp_vault))
+                    VaultIndexer(str(temp_vault))
 
             # Old file must still be there — migration skipped
             assert old_meta.exists(), "old meta must be left untouched"
@@ -668,26 +1171,22 @@ class TestCacheMigration:
         old_meta.write_text('{"meta": {}, "tombstones": []}')
 
         try:
-            with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-                mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-                mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-                # Force Path.replace to blow up
-                def boom(self: Path, target: Path) -> Path:
-                    raise OSError("simulated cross-device link")
-
-                with (
-                    patch.object(Path, "replace", boom),
-                    patch(
-                        "semantic_search.indexer.user_cache_dir",
-                        return_value=str(fake_cache_root),
-                    ),
-                ):
-                    from semantic_search.indexer import VaultIndexer
+            # Force Path.replace to blow up
+            def boom(self: Path, target: Path) -> Path:
+                raise OSError("simulated cross-device link")
 
-                    # Must not raise
-                    indexer = VaultIndexer(str(temp_vault))
-                    assert indexer.index_dir.parent == fake_cache_root
+            with (
+                patch.object(Path, "replace", boom),
+                patch(
+                    "semantic_search.indexer.user_cache_dir",
+                    return_value=str(fake_cache_root),
+                ),
+            ):
+                from semantic_search.indexer import VaultIndexer
+
+                # Must not raise
+                indexer = VaultIndexer(str(temp_vault))
+                assert indexer.index_dir.parent == fake_cache_root
         finally:
             if old_meta.exists():
                 old_meta.unlink()
@@ -703,19 +1202,29 @@ class TestVaultIndexerGetContent:
         test_file = temp_vault / "full-note.md"
         test_file.write_text("Line one.\nLine two.\nLine three.")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
-            result = indexer.get_content(str(test_file))
+        indexer = VaultIndexer(str(temp_vault))
+        result = indexer.get_content(str(test_file))
 
         assert result["mode"] == "full"
         assert result["path"] == str(test_file.resolve())
         assert result["content"] == "Line one.\nLine two.\nLine three."
 
+    def test_crlf_and_latin1_files_are_decoded(self, temp_vault: Path) -> None:
+        """Windows line endings are normalized and non-UTF-8 files fall back to latin-1."""
+        crlf = temp_vault / "crlf.md"
+        crlf.write_bytes(b"One\r\nTwo\rThree")
+        latin = temp_vault / "latin.md"
+        latin.write_bytes("Caf\u00e9".encode("latin-1"))
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+
+        assert indexer.get_content(str(crlf))["content"] == "One\nTwo\nThree"
+        assert indexer.get_content(str(latin))["content"] == "Caf\u00e9"
+
     def test_unresolved_vault_path_with_symlink_root_accepted(self, tmp_path: Path) -> None:
         """Regression: vault root that crosses a symlink (e.g. macOS /tmp -> /private/tmp)
         must still accept files inside it. The validator must resolve vault paths
@@ -726,14 +1235,10 @@ class TestVaultIndexerGetContent:
         symlink_root = tmp_path / "via-symlink"
         symlink_root.symlink_to(real_root)
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(symlink_root))
-            result = indexer.get_content(str(symlink_root / "note.md"))
+        indexer = VaultIndexer(str(symlink_root))
+        result = indexer.get_content(str(symlink_root / "note.md"))
 
         assert result["mode"] == "full"
         assert result["content"] == "hello"
@@ -745,16 +1250,12 @@ class TestVaultIndexerGetContent:
             "Line zero.\nUNIQUE_TOKEN_XYZ in line two.\nLine three.\nLine four.\nLine five."
         )
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
-            result = indexer.get_content(
-                str(test_file), snippet=True, query="UNIQUE_TOKEN_XYZ", context_lines=2
-            )
+        indexer = VaultIndexer(str(temp_vault))
+        result = indexer.get_content(
+            str(test_file), snippet=True, query="UNIQUE_TOKEN_XYZ", context_lines=2
+        )
 
         assert result["mode"] == "snippet"
         assert "UNIQUE_TOKEN_XYZ" in result["content"]
@@ -767,14 +1268,10 @@ class TestVaultIndexerGetContent:
         test_file = temp_vault / "snippet-no-query.md"
         test_file.write_text(lines)
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(temp_vault))
-            result = indexer.get_content(str(test_file), snippet=True, context_lines=2)
+        indexer = VaultIndexer(str(temp_vault))
+        result = indexer.get_content(str(test_file), snippet=True, context_lines=2)
 
         assert result["mode"] == "snippet"
         content_lines = result["content"].split("\n")
@@ -783,29 +1280,21 @@ class TestVaultIndexerGetContent:
 
     def test_path_traversal_rejected(self, temp_vault: Path) -> None:
         """../../etc/passwd raises ValueError with 'not in indexed roots'."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
+        indexer = VaultIndexer(str(temp_vault))
 
-            with pytest.raises(ValueError, match="not in indexed roots"):
-                indexer.get_content("../../etc/passwd")
+        with pytest.raises(ValueError, match="not in indexed roots"):
+            indexer.get_content("../../etc/passwd")
 
     def test_absolute_path_outside_roots_rejected(self, temp_vault: Path) -> None:
         """Absolute path outside vault roots raises ValueError."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
+        indexer = VaultIndexer(str(temp_vault))
 
-            indexer = VaultIndexer(str(temp_vault))
-
-            with pytest.raises(ValueError, match="not in indexed roots"):
-                indexer.get_content("/tmp/other-file.txt")
+        with pytest.raises(ValueError, match="not in indexed roots"):
+            indexer.get_content("/tmp/other-file.txt")
 
     def test_symlink_escape_rejected(self, temp_vault: Path, tmp_path: Path) -> None:
         """Symlink pointing outside vault roots raises ValueError."""
@@ -815,45 +1304,33 @@ class TestVaultIndexerGetContent:
         link = temp_vault / "link.md"
         link.symlink_to(outside)
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(temp_vault))
+        indexer = VaultIndexer(str(temp_vault))
 
-            # Resolving the symlink lands outside the vault → rejected
-            with pytest.raises(ValueError, match="not in indexed roots"):
-                indexer.get_content(str(link))
+        # Resolving the symlink lands outside the vault → rejected
+        with pytest.raises(ValueError, match="not in indexed roots"):
+            indexer.get_content(str(link))
 
     def test_missing_file_raises_file_not_found_error(self, temp_vault: Path) -> None:
         """Path inside vault but file missing raises FileNotFoundError."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
+        indexer = VaultIndexer(str(temp_vault))
 
-            with pytest.raises(FileNotFoundError):
-                indexer.get_content(str(temp_vault / "does-not-exist.md"))
+        with pytest.raises(FileNotFoundError):
+            indexer.get_content(str(temp_vault / "does-not-exist.md"))
 
     def test_context_lines_negative_clamped_to_zero(self, temp_vault: Path) -> None:
         """context_lines < 0 is clamped to 0."""
         test_file = temp_vault / "clamp-test.md"
         test_file.write_text("Line zero.\nLine one.\nLine two.\n")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
-            # With context_lines=-5 (clamped to 0), returns first 1 line
-            result = indexer.get_content(str(test_file), snippet=True, context_lines=-5)
+        indexer = VaultIndexer(str(temp_vault))
+        # With context_lines=-5 (clamped to 0), returns first 1 line
+        result = indexer.get_content(str(test_file), snippet=True, context_lines=-5)
 
         assert result["mode"] == "snippet"
         # Should have at most 1 line (2*0+1=1)
@@ -864,14 +1341,10 @@ class TestVaultIndexerGetContent:
         test_file = temp_vault / "short-file.md"
         test_file.write_text("Short.\n")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(temp_vault))
-            result = indexer.get_content(str(test_file), snippet=True, context_lines=10000)
+        indexer = VaultIndexer(str(temp_vault))
+        result = indexer.get_content(str(test_file), snippet=True, context_lines=10000)
 
         assert result["mode"] == "snippet"
         assert result["content"] == "Short.\n"
@@ -881,19 +1354,15 @@ class TestVaultIndexerGetContent:
         test_file = temp_vault / "no-match.md"
         test_file.write_text("Line zero.\nLine one.\nLine two.\n")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(temp_vault))
-            result = indexer.get_content(
-                str(test_file),
-                snippet=True,
-                query="NO_MATCHING_TOKEN_THAT_DOES_NOT_APPEAR",
-                context_lines=2,
-            )
+        indexer = VaultIndexer(str(temp_vault))
+        result = indexer.get_content(
+            str(test_file),
+            snippet=True,
+            query="NO_MATCHING_TOKEN_THAT_DOES_NOT_APPEAR",
+            context_lines=2,
+        )
 
         assert result["mode"] == "snippet"
         assert "Line zero" in result["content"]
@@ -903,19 +1372,347 @@ class TestVaultIndexerGetContent:
         test_file = temp_vault / "binary.bin"
         test_file.write_bytes(b"\xff\xfe\x00\x00")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
+        indexer = VaultIndexer(str(temp_vault))
 
-            indexer = VaultIndexer(str(temp_vault))
+        with (
+            patch.object(indexer, "_read_file", return_value=None),
+            pytest.raises(RuntimeError, match="could not read file"),
+        ):
+            indexer.get_content(str(test_file))
 
-            with (
-                patch.object(indexer, "_read_file", return_value=None),
-                pytest.raises(RuntimeError, match="could not read file"),
-            ):
-                indexer.get_content(str(test_file))
+
+class TestEmbeddingBackend:
+    """Tests for selecting the PyTorch or int8 ONNX embedding backend."""
+
+    def test_default_backend_is_torch(self, temp_vault: Path, mock_st: Mock) -> None:
+        """Without configuration the model loads with the default PyTorch backend."""
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+
+        mock_st.assert_called_once_with("all-MiniLM-L6-v2", device=None)
+        assert indexer.embedding_backend == "torch"
+
+    def test_device_from_env(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch, mock_st: Mock
+    ) -> None:
+        """EMBED_DEVICE overrides sentence-transformers' device auto-detection."""
+        monkeypatch.setenv("EMBED_DEVICE", "cpu")
+
+        from semantic_search.indexer import VaultIndexer
+
+        VaultIndexer(str(temp_vault))
+
+        mock_st.assert_called_once_with("all-MiniLM-L6-v2", device="cpu")
+
+    def test_gpu_model_is_warmed_up(self, temp_vault: Path, mock_st: Mock) -> None:
+        """On a CUDA/MPS device the model runs one encode at startup."""
+        mock_st.return_value.device.type = "cuda"
+
+        from semantic_search.indexer import VaultIndexer
+
+        VaultIndexer(str(temp_vault))
+
+        assert mock_st.return_value.encode.call_args.args[0] == ["warm-up"]
+
+    def test_cuda_model_runs_in_fp16(self, temp_vault: Path, mock_st: Mock) -> None:
+        """A CUDA model is cast to FP16 and caches its vectors under separate keys."""
+        mock_st.return_value.device.type = "cuda"
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+
+        mock_st.return_value.half.assert_called_once_with()
+        assert indexer._embedding_cache._model_name == "all-MiniLM-L6-v2@fp16"
+
+    def test_cpu_model_stays_fp32(self, temp_vault: Path, mock_st: Mock) -> None:
+        """FP16 is only used on CUDA; CPU inference keeps full precision."""
+        mock_st.return_value.device.type = "cpu"
+
+        from semantic_search.indexer import VaultIndexer
+
+        VaultIndexer(str(temp_vault))
+
+        mock_st.return_value.half.assert_not_called()
+
+    def test_onnx_backend_from_env(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch, mock_st: Mock
+    ) -> None:
+        """EMBED_BACKEND=onnx loads the quantized ONNX export."""
+        monkeypatch.setenv("EMBED_BACKEND", "onnx")
+
+        from semantic_search.indexer import ONNX_INT8_MODEL_FILE, VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+
+        mock_st.assert_called_once_with(
+            "all-MiniLM-L6-v2",
+            device=None,
+            backend="onnx",
+            model_kwargs={"file_name": ONNX_INT8_MODEL_FILE},
+        )
+        assert indexer.embedding_backend == "onnx"
+
+    def test_onnx_backend_falls_back_to_torch(self, temp_vault: Path, mock_st: Mock) -> None:
+        """A failing ONNX load (e.g. missing extras) falls back to PyTorch."""
+        torch_model = Mock()
+        torch_model.get_sentence_embedding_dimension.return_value = 384
+        torch_model.encode.side_effect = _fake_encode
+        mock_st.side_effect = [ImportError("optimum not installed"), torch_model]
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault), embedding_backend="onnx")
+
+        assert indexer.model is torch_model
+        assert indexer.embedding_backend == "torch"
+
+
+class TestBuildIndex:
+    """Tests for choosing the FAISS index type by vault size."""
+
+    def _random_unit_vectors(self, n: int) -> np.ndarray:
+        rng = np.random.default_rng(42)
+        vecs = rng.standard_normal((n, 384)).astype(np.float32)
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+    def test_small_vault_uses_flat_index(self, temp_vault: Path) -> None:
+        """Below HNSW_MIN_VECTORS the index is an exhaustive scan over fp16 vectors."""
+        import faiss
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        index = indexer._build_index(self._random_unit_vectors(10))
+
+        assert isinstance(index, faiss.IndexScalarQuantizer)
+        assert index.sq.qtype == faiss.ScalarQuantizer.QT_fp16
+        assert index.ntotal == 10
+
+    def test_medium_vault_uses_hnsw_index(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Between HNSW_MIN_VECTORS and IVFPQ_MIN_VECTORS the index is an HNSW graph."""
+        monkeypatch.setattr("semantic_search.indexer.HNSW_MIN_VECTORS", 100)
+
+        import faiss
+
+        from semantic_search.indexer import HNSW_EF_SEARCH, VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        vecs = self._random_unit_vectors(300)
+        index = indexer._build_index(vecs)
+
+        assert isinstance(index, faiss.IndexHNSWSQ)
+        assert index.ntotal == 300
+        assert index.hnsw.efSearch == HNSW_EF_SEARCH
+        _, indices = index.search(vecs[7:8], 1)
+        assert indices[0][0] == 7
+
+    def test_hnsw_scores_stay_exact_enough_for_duplicate_threshold(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The HNSW tier stores fp16 codes, so the scores find_duplicates compares
+        against duplicate_threshold match exact float32 inner products to ~1e-3."""
+        monkeypatch.setattr("semantic_search.indexer.HNSW_MIN_VECTORS", 100)
+
+        import faiss
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        vecs = self._random_unit_vectors(2000)
+        index = indexer._build_index(vecs)
+        assert faiss.downcast_index(index.storage).sq.qtype == faiss.ScalarQuantizer.QT_fp16
+
+        scores, ids = index.search(vecs[:50], 10)
+        exact = np.einsum("qd,qkd->qk", vecs[:50], vecs[ids])
+        assert np.abs(scores - exact).max() < 1e-3
+
+    def test_large_vault_uses_ivfpq_index(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """At IVFPQ_MIN_VECTORS and above the index is a trained IndexIVFPQ."""
+        monkeypatch.setattr("semantic_search.indexer.HNSW_MIN_VECTORS", 100)
+        monkeypatch.setattr("semantic_search.indexer.IVFPQ_MIN_VECTORS", 300)
+
+        import faiss
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        vecs = self._random_unit_vectors(300)
+        index = indexer._build_index(vecs)
+
+        assert isinstance(index, faiss.IndexIVFPQ)
+        assert index.is_trained
+        assert index.ntotal == 300
+        assert index.nprobe >= 8
+        # A stored vector must find itself as its nearest neighbour
+        _, indices = index.search(vecs[7:8], 1)
+        assert indices[0][0] == 7
+
+    def test_index_type_pins_tier_regardless_of_size(self, temp_vault: Path) -> None:
+        """index_type="hnsw" builds an HNSW graph even for a handful of notes."""
+        import faiss
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault), index_type="hnsw")
+
+        assert isinstance(indexer.index, faiss.IndexHNSWSQ)
+        assert [r["path"] for r in indexer.search("test")] == [str(temp_vault / "test-note.md")]
+
+    def test_index_type_from_env_and_ivfpq_fallback(
+        self, temp_vault: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """INDEX_TYPE=ivfpq is honoured, but too few notes to train fall back to flat."""
+        monkeypatch.setenv("INDEX_TYPE", "IVFPQ")
+
+        import faiss
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        large = indexer._build_index(self._random_unit_vectors(300))
+
+        assert indexer.index_type == "ivfpq"
+        assert isinstance(indexer.index, faiss.IndexScalarQuantizer)
+        assert isinstance(large, faiss.IndexIVFPQ)
+
+    def test_unknown_index_type_is_rejected(self, temp_vault: Path) -> None:
+        """A typo in index_type fails fast instead of silently using a default."""
+        from semantic_search.indexer import VaultIndexer
+
+        with pytest.raises(ValueError, match="Unknown index type"):
+            VaultIndexer(str(temp_vault), index_type="lsh")
+
+
+class TestWeightedEmbedding:
+    """Tests for embedding notes as a weighted mean of their components."""
+
+    def test_parts_carry_component_weights(self, parsing_indexer: "VaultIndexer") -> None:
+        """Each component appears once, tagged with its weight."""
+        content = "---\ntitle: Title\ntags: [tag]\n---\n# Heading\nBody text\n"
+
+        parts = parsing_indexer._prepare_parts_for_embedding(Path("my-note.md"), content)
+
+        assert parts == [
+            (3, "my note"),
+            (3, "Title"),
+            (2, "tag"),
+            (2, "Heading"),
+            (1, "# Heading Body text"),
+        ]
+
+    def test_tags_keep_first_seen_order(self, parsing_indexer: "VaultIndexer") -> None:
+        """Tag text is deterministic (frontmatter order, then inline tags, deduped
+        case-insensitively) so its embedding-cache key is stable across runs."""
+        content = "---\ntags: [Zeta, alpha]\n---\nSee #mid and #ZETA and #omega\n"
+
+        parts = parsing_indexer._prepare_parts_for_embedding(Path("note.md"), content)
+
+        assert (2, "zeta alpha mid omega") in parts
+
+    def test_heading_and_body_extraction(self, parsing_indexer: "VaultIndexer") -> None:
+        """Only a real H1 is the heading, and the body keeps the first 500 words."""
+        words = " ".join(f"w{i}" for i in range(800))
+        content = f"## Not H1\n#\n  # Real Heading  \n{words}\n"
+
+        parts = parsing_indexer._prepare_parts_for_embedding(Path("long.md"), content)
+
+        assert (2, "Real Heading") in parts
+        body = parts[-1][1].split()
+        assert len(body) == 500
+        assert body[-1] == "w492"  # 7 heading-line words come first
+
+    def test_body_is_capped_at_model_input_length(self, tmp_path: Path, mock_st: Mock) -> None:
+        """With a 256-token model, words past the 256th can never be embedded."""
+        mock_st.return_value.get_max_seq_length.return_value = 256
+        mock_st.return_value.encode.side_effect = _fake_encode
+
+        from semantic_search.indexer import VaultIndexer
+
+        vault = tmp_path / "vault"
+        vault.mkdir()
+        test_file = vault / "long.md"
+        test_file.write_text(" ".join(f"w{i}" for i in range(800)))
+
+        indexer = VaultIndexer(str(vault))
+        parts = indexer._prepare_parts_for_embedding(test_file, test_file.read_text())
+
+        body = parts[-1][1].split()
+        assert len(body) == 256
+        assert body[-1] == "w255"
+
+    def test_note_vector_is_normalized_weighted_mean(self, temp_vault: Path, mock_st: Mock) -> None:
+        """The note vector is the L2-normalized weighted sum of component vectors,
+        and each distinct component is encoded only once."""
+        component_vecs = {
+            "a": np.eye(384, dtype=np.float32)[0],
+            "b": np.eye(384, dtype=np.float32)[1],
+        }
+
+        def encode(texts: list[str], **kwargs: Any) -> np.ndarray:
+            return np.stack([component_vecs[t] for t in texts])
+
+        from semantic_search.indexer import VaultIndexer
+
+        indexer = VaultIndexer(str(temp_vault))
+        mock_st.return_value.encode.reset_mock()
+        mock_st.return_value.encode.side_effect = encode
+
+        vecs, _ = indexer._embed_documents([[(3, "a"), (1, "b")], [(2, "b")]])
+
+        assert mock_st.return_value.encode.call_count == 1
+        assert mock_st.return_value.encode.call_args.args[0] == ["a", "b"]
+        expected = np.zeros(384, dtype=np.float32)
+        expected[:2] = [3, 1]
+        np.testing.assert_allclose(vecs[0], expected / np.linalg.norm(expected), rtol=1e-6)
+        np.testing.assert_allclose(vecs[1], component_vecs["b"])
+
+
+class TestFastFrontmatter:
+    """Tests for the PyYAML-free frontmatter fast path."""
+
+    def test_common_shapes_match_yaml(self) -> None:
+        """Inline, flow-list and block-list values parse exactly like PyYAML."""
+        import yaml
+
+        from semantic_search.indexer import _fast_frontmatter
+
+        samples = [
+            "title: My Note\ntags: [project, team-a/sub]\ncreated: 2024-01-01",
+            "title: 'Quoted: title'\naliases:\n  - One\n  - Two\nstatus: draft",
+            'tags:\n- "a b"\n- c\naliases: []\ntitle:',
+            "",
+        ]
+        for text in samples:
+            expected = {
+                k: v
+                for k, v in (yaml.safe_load(text) or {}).items()
+                if k in ("title", "tags", "aliases")
+            }
+            assert _fast_frontmatter(text) == expected, text
+
+    def test_ambiguous_yaml_falls_back(self) -> None:
+        """Anything YAML might read differently returns None (use PyYAML)."""
+        from semantic_search.indexer import _fast_frontmatter
+
+        for text in [
+            "title: true",  # bool
+            "tags: [2024, x]",  # int
+            "title: a # comment",
+            "title: >\n  folded",
+            "meta:\n  nested: 1",
+            "title: a: b",
+            "aliases:\n  - a\n    - b",
+            "title: *anchor",
+        ]:
+            assert _fast_frontmatter(text) is None, text
 
 
 class TestEmbedNoProgressBar:
@@ -925,31 +1722,32 @@ class TestEmbedNoProgressBar:
     auto-enables tqdm — not thread-safe. We always pass False.
     """
 
-    def test_embed_text_passes_show_progress_bar_false(self, temp_vault: Path) -> None:
+    def test_embed_text_passes_show_progress_bar_false(
+        self, temp_vault: Path, mock_st: Mock
+    ) -> None:
         """_embed_text must pass show_progress_bar=False to model.encode()."""
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_model = Mock()
-            mock_model.get_sentence_embedding_dimension.return_value = 384
-            mock_model.encode.return_value = np.array([[0.1] * 384])
-            mock_st.return_value = mock_model
+        mock_model = Mock()
+        mock_model.get_sentence_embedding_dimension.return_value = 384
+        mock_model.encode.side_effect = _fake_encode
+        mock_st.return_value = mock_model
 
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(temp_vault))
+        indexer = VaultIndexer(str(temp_vault))
 
-            # Clear any calls from __init__/rebuild
-            mock_model.encode.reset_mock()
+        # Clear any calls from __init__/rebuild
+        mock_model.encode.reset_mock()
 
-            # Trigger an embed
-            indexer._embed_text("hello world")
+        # Trigger an embed
+        indexer._embed_text("hello world")
 
-            # Assert last call had show_progress_bar=False
-            assert mock_model.encode.called
-            call_kwargs = mock_model.encode.call_args.kwargs
-            assert call_kwargs.get("show_progress_bar") is False, (
-                f"encode() must be called with show_progress_bar=False "
-                f"to avoid the tqdm threading race; got kwargs={call_kwargs}"
-            )
+        # Assert last call had show_progress_bar=False
+        assert mock_model.encode.called
+        call_kwargs = mock_model.encode.call_args.kwargs
+        assert call_kwargs.get("show_progress_bar") is False, (
+            f"encode() must be called with show_progress_bar=False "
+            f"to avoid the tqdm threading race; got kwargs={call_kwargs}"
+        )
 
 
 class TestVaultIgnoreIntegration:
@@ -966,14 +1764,10 @@ class TestVaultIgnoreIntegration:
         (archive / "old.md").write_text("# Old\nArchived content")
         (vault / ".semanticignore").write_text("archive/\n")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(vault))
-            indexer.rebuild_index()
+        indexer = VaultIndexer(str(vault))
+        indexer.rebuild_index()
 
         indexed_names = {Path(v["path"]).name for v in indexer.meta.values()}
         assert indexed_names == {"a.md", "b.md"}
@@ -989,19 +1783,15 @@ class TestVaultIgnoreIntegration:
         (archive / "old.md").write_text("# Old\nArchived")
         (vault / ".semanticignore").write_text("archive/\n")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(vault))
-            indexer.rebuild_index()
+        indexer = VaultIndexer(str(vault))
+        indexer.rebuild_index()
 
-            ntotal_before = indexer.index.ntotal
-            meta_before = dict(indexer.meta)
+        ntotal_before = indexer.index.ntotal
+        meta_before = dict(indexer.meta)
 
-            indexer.add_file_to_index(str(archive / "old.md"))
+        indexer.add_file_to_index(str(archive / "old.md"))
 
         assert indexer.index.ntotal == ntotal_before
         assert indexer.meta == meta_before
@@ -1016,28 +1806,21 @@ class TestVaultIgnoreIntegration:
         # Test with empty .semanticignore
         (vault / ".semanticignore").write_text("")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(vault))
-            indexer.rebuild_index()
+        indexer = VaultIndexer(str(vault))
+        indexer.rebuild_index()
 
         basenames = {Path(v["path"]).name for v in indexer.meta.values()}
         assert ".semanticignore" not in basenames
 
         # Test with non-empty .semanticignore
         (vault / ".semanticignore").write_text("archive/\n")
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
 
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer2 = VaultIndexer(str(vault))
-            indexer2.rebuild_index()
+        indexer2 = VaultIndexer(str(vault))
+        indexer2.rebuild_index()
 
         basenames2 = {Path(v["path"]).name for v in indexer2.meta.values()}
         assert ".semanticignore" not in basenames2
@@ -1058,14 +1841,10 @@ class TestVaultIgnoreIntegration:
         (vault_b / "other.md").write_text("# Other B")
         (vault_b / ".semanticignore").write_text("")  # no patterns
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer([str(vault_a), str(vault_b)])
-            indexer.rebuild_index()
+        indexer = VaultIndexer([str(vault_a), str(vault_b)])
+        indexer.rebuild_index()
 
         indexed_paths = {v["path"] for v in indexer.meta.values()}
 
@@ -1090,16 +1869,12 @@ class TestVaultIgnoreIntegration:
         (archive / "old.md").write_text("# Old")
         (vault / ".semanticignore").write_text("archive/\n")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(str(vault))
+        indexer = VaultIndexer(str(vault))
 
-            with caplog.at_level(logging.INFO, logger="semantic_search.indexer"):
-                indexer.rebuild_index()
+        with caplog.at_level(logging.INFO, logger="semantic_search.indexer"):
+            indexer.rebuild_index()
 
         pattern = re.compile(r"rebuild_index skipped (\d+) files for vault .+")
         matching = [r for r in caplog.records if pattern.search(r.message)]
@@ -1121,14 +1896,10 @@ class TestVaultIgnoreIntegration:
         vault.mkdir()
         (vault / "note.md").write_text("# Note")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
+        from semantic_search.indexer import VaultIndexer
 
-            from semantic_search.indexer import VaultIndexer
-
-            indexer = VaultIndexer(str(vault))
-            assert len(indexer.vault_paths) == 1
+        indexer = VaultIndexer(str(vault))
+        assert len(indexer.vault_paths) == 1
 
     def test_backward_compat_keyword_args(self, tmp_path: Path) -> None:
         """VaultIndexer with embedding_model= and duplicate_threshold= keywords still works."""
@@ -1136,15 +1907,11 @@ class TestVaultIgnoreIntegration:
         vault.mkdir()
         (vault / "note.md").write_text("# Note")
 
-        with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-            mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-            mock_st.return_value.encode.return_value = np.array([[0.1] * 384])
-
-            from semantic_search.indexer import VaultIndexer
+        from semantic_search.indexer import VaultIndexer
 
-            indexer = VaultIndexer(
-                str(vault),
-                embedding_model="all-MiniLM-L6-v2",
-                duplicate_threshold=0.90,
-            )
-            assert indexer.duplicate_threshold == 0.90
+        indexer = VaultIndexer(
+            str(vault),
+            embedding_model="all-MiniLM-L6-v2",
+            duplicate_threshold=0.90,
+        )
+        assert indexer.duplicate_threshold == 0.90
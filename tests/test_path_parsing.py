@@ -1,55 +1,36 @@
 """Tests for CONTENT_PATH parsing."""
 
-import os
-
 import pytest
 
+from semantic_search.config import content_paths_from_env, parse_content_path
 
-def test_single_path_parsing(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Test single path is parsed correctly."""
-    monkeypatch.setenv("CONTENT_PATH", "/path/to/vault")
-
-    raw_paths = os.environ.get("CONTENT_PATH", "./content")
-    paths = [p.strip() for p in raw_paths.split(",") if p.strip()]
-
-    assert paths == ["/path/to/vault"]
-
-
-def test_multiple_paths_parsing(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Test comma-separated paths are parsed correctly."""
-    monkeypatch.setenv("CONTENT_PATH", "/vault1,/vault2,/vault3")
-
-    raw_paths = os.environ.get("CONTENT_PATH", "./content")
-    paths = [p.strip() for p in raw_paths.split(",") if p.strip()]
 
-    assert paths == ["/vault1", "/vault2", "/vault3"]
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        pytest.param("/path/to/vault", ["/path/to/vault"], id="single-path"),
+        pytest.param("/vault1,/vault2,/vault3", ["/vault1", "/vault2", "/vault3"], id="multiple"),
+        pytest.param(
+            " /vault1 , /vault2 , /vault3 ", ["/vault1", "/vault2", "/vault3"], id="whitespace"
+        ),
+        pytest.param("/vault1,,/vault2,", ["/vault1", "/vault2"], id="empty-segments"),
+        pytest.param(" , ,", [], id="only-separators"),
+    ],
+)
+def test_parse_content_path(raw: str, expected: list[str]) -> None:
+    """Comma-separated paths are trimmed and empty segments dropped."""
+    assert parse_content_path(raw) == expected
 
 
-def test_paths_with_whitespace_trimmed(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Test whitespace around paths is trimmed."""
-    monkeypatch.setenv("CONTENT_PATH", " /vault1 , /vault2 , /vault3 ")
+def test_content_paths_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    """CONTENT_PATH is parsed from the environment."""
+    monkeypatch.setenv("CONTENT_PATH", "/vault1, /vault2")
 
-    raw_paths = os.environ.get("CONTENT_PATH", "./content")
-    paths = [p.strip() for p in raw_paths.split(",") if p.strip()]
-
-    assert paths == ["/vault1", "/vault2", "/vault3"]
-
-
-def test_empty_segments_ignored(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Test empty segments from double commas are ignored."""
-    monkeypatch.setenv("CONTENT_PATH", "/vault1,,/vault2,")
-
-    raw_paths = os.environ.get("CONTENT_PATH", "./content")
-    paths = [p.strip() for p in raw_paths.split(",") if p.strip()]
-
-    assert paths == ["/vault1", "/vault2"]
+    assert content_paths_from_env() == ["/vault1", "/vault2"]
 
 
 def test_default_path_when_not_set(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Test default path is used when CONTENT_PATH not set."""
+    """./content is used when CONTENT_PATH is not set."""
     monkeypatch.delenv("CONTENT_PATH", raising=False)
 
-    raw_paths = os.environ.get("CONTENT_PATH", "./content")
-    paths = [p.strip() for p in raw_paths.split(",") if p.strip()]
-
-    assert paths == ["./content"]
+    assert content_paths_from_env() == ["./content"]
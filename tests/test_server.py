@@ -1,10 +1,11 @@
 """Tests for MCP server tools."""
 
 from pathlib import Path
-from unittest.mock import patch
 
 import pytest
 
+pytestmark = pytest.mark.usefixtures("mock_st")
+
 
 class TestMcpGetContentTool:
     """Tests for get_content MCP tool."""
@@ -27,14 +28,9 @@ class TestMcpGetContentTool:
         factory._watcher = None
 
         try:
-            # Patch SentenceTransformer so indexing is fast
-            with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-                mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-                mock_st.return_value.encode.return_value = [[0.1] * 384]
-
-                from semantic_search.server import get_content
+            from semantic_search.server import get_content
 
-                result = get_content(path=str(test_file))
+            result = get_content(path=str(test_file))
 
             assert result["mode"] == "full"
             assert result["path"] == str(test_file.resolve())
@@ -58,18 +54,14 @@ class TestMcpGetContentTool:
         factory._watcher = None
 
         try:
-            with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-                mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-                mock_st.return_value.encode.return_value = [[0.1] * 384]
-
-                from semantic_search.server import get_content
+            from semantic_search.server import get_content
 
-                result = get_content(
-                    path=str(test_file),
-                    snippet=True,
-                    query="UNIQUE_TOKEN_XYZ",
-                    context_lines=2,
-                )
+            result = get_content(
+                path=str(test_file),
+                snippet=True,
+                query="UNIQUE_TOKEN_XYZ",
+                context_lines=2,
+            )
 
             assert result["mode"] == "snippet"
             assert "UNIQUE_TOKEN_XYZ" in result["content"]
@@ -89,14 +81,10 @@ class TestMcpGetContentTool:
         factory._watcher = None
 
         try:
-            with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-                mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-                mock_st.return_value.encode.return_value = [[0.1] * 384]
+            from semantic_search.server import get_content
 
-                from semantic_search.server import get_content
-
-                with pytest.raises(ValueError, match="not in indexed roots"):
-                    get_content(path="/etc/passwd")
+            with pytest.raises(ValueError, match="not in indexed roots"):
+                get_content(path="/etc/passwd")
         finally:
             server_module.CONTENT_PATHS = original_paths
 
@@ -113,13 +101,9 @@ class TestMcpGetContentTool:
         factory._watcher = None
 
         try:
-            with patch("semantic_search.indexer.SentenceTransformer") as mock_st:
-                mock_st.return_value.get_sentence_embedding_dimension.return_value = 384
-                mock_st.return_value.encode.return_value = [[0.1] * 384]
-
-                from semantic_search.server import get_content
+            from semantic_search.server import get_content
 
-                with pytest.raises(FileNotFoundError):
-                    get_content(path=str(temp_vault / "does-not-exist.md"))
+            with pytest.raises(FileNotFoundError):
+                get_content(path=str(temp_vault / "does-not-exist.md"))
         finally:
             server_module.CONTENT_PATHS = original_paths